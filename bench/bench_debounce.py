@@ -0,0 +1,113 @@
+"""Debouncer 基准：队首过期 vs 每次扫描会话桶
+
+用法（仓库根目录，需在已安装 AstrBot 的环境中运行）：
+    python bench/bench_debounce.py [--sessions 10000] [--hits 200000] [--interval 300]
+
+使用模拟时钟，每次命中推进固定步长，两种实现看到完全相同的请求序列
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    from core import debounce
+except ModuleNotFoundError as exc:
+    sys.exit(f"缺少依赖 {exc.name}，请在 AstrBot 环境中运行")
+
+
+class BucketDebouncer:
+    """改动前的实现：每个会话一个 dict，每次命中扫描整个会话桶清理过期"""
+
+    def __init__(self, config: dict):
+        self.interval = config["debounce_interval"]
+        self._cache: dict[str, dict[str, float]] = {}
+
+    def _hit(self, session: str, key: str) -> bool:
+        if self.interval <= 0:
+            return False
+        now = debounce.time.time()
+        bucket = self._cache.setdefault(session, {})
+        expire = now - self.interval
+        for k, ts in list(bucket.items()):
+            if ts < expire:
+                bucket.pop(k, None)
+        if key in bucket:
+            return True
+        bucket[key] = now
+        return False
+
+    def hit_link(self, session: str, link: str) -> bool:
+        return self._hit(session, f"link:{link}")
+
+
+class FakeClock:
+    def __init__(self, step: float):
+        self.now = 1_000_000.0
+        self.step = step
+
+    def time(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+def make_workload(
+    sessions: int, hits: int, busy: int, busy_share: float, seed: int = 0
+) -> list[tuple[str, str]]:
+    """busy 个活跃群占 busy_share 的请求，其余均匀分布；链接有一定重复率"""
+    rng = random.Random(seed)
+    names = [f"aiocqhttp:GroupMessage:{i}" for i in range(sessions)]
+    workload = []
+    for _ in range(hits):
+        if busy and rng.random() < busy_share:
+            session = names[rng.randrange(busy)]
+        else:
+            session = rng.choice(names)
+        workload.append((session, f"https://b23.tv/{rng.randrange(hits // 2):x}"))
+    return workload
+
+
+def run(cls, config: dict, workload: list[tuple[str, str]], step: float) -> float:
+    clock = FakeClock(step)
+    debounce.time = clock  # 两种实现都经 debounce.time 取时间
+    try:
+        debouncer = cls(config)
+        start = time.perf_counter()
+        for session, link in workload:
+            debouncer.hit_link(session, link)
+        return (time.perf_counter() - start) / len(workload)
+    finally:
+        debounce.time = time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--hits", type=int, default=200000)
+    parser.add_argument("--interval", type=float, default=300)
+    parser.add_argument("--step", type=float, default=0.01, help="每次命中推进的秒数")
+    args = parser.parse_args()
+
+    config = {"debounce_interval": args.interval}
+    scenarios = {
+        "均匀分布": (0, 0.0),
+        "20 个活跃群占 80%": (20, 0.8),
+    }
+    print(
+        f"{args.sessions} 个会话，{args.hits} 次命中，防抖 {args.interval:g}s，"
+        f"每次命中推进 {args.step:g}s"
+    )
+    for name, (busy, share) in scenarios.items():
+        workload = make_workload(args.sessions, args.hits, busy, share)
+        old = run(BucketDebouncer, config, workload, args.step)
+        new = run(debounce.Debouncer, config, workload, args.step)
+        print(f"  {name}: 改动前 {old * 1e6:.1f} us/op，改动后 {new * 1e6:.1f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""KeywordMatcher 基准：单趟匹配 vs 逐关键词遍历
+
+用法（仓库根目录）：python bench/bench_matcher.py [--messages 1000] [--link-ratio 0.05]
+
+关键词-正则对直接从 core/parsers 源码中的 @handle 提取，无需安装 AstrBot
+"""
+
+import argparse
+import ast
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+from re import Match, Pattern
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.matcher import KeywordMatcher  # noqa: E402
+
+SAMPLE_LINKS = [
+    "https://www.bilibili.com/video/BV1xx411c7mD",
+    "https://b23.tv/abcdEFG",
+    "https://v.douyin.com/iRNBho6u/",
+    "https://weibo.com/7207262816/P5kWdcfDe",
+    "http://xhslink.com/a/WHdZNpdzwbl7",
+    "https://www.kuaishou.com/short-video/3xhjgcmir24m4nm",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://x.com/elonmusk/status/1234567890123456789",
+    "https://www.acfun.cn/v/ac46593564",
+    "https://music.163.com/song?id=1901371647",
+]
+
+CHAT_WORDS = (
+    "今天 晚上 吃什么 哈哈哈 这个 视频 真的 好看 明天 开会 记得 带 电脑 "
+    "ok 收到 lol 有人 打游戏 吗 周末 出去 玩 天气 不错"
+).split()
+
+
+def load_key_patterns() -> list[tuple[str, Pattern[str]]]:
+    """从解析器源码中收集 @handle(keyword, pattern)"""
+    key_patterns: list[tuple[str, Pattern[str]]] = []
+    for path in sorted((ROOT / "core" / "parsers").rglob("*.py")):
+        if path.name == "example.py":
+            continue
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.AsyncFunctionDef):
+                continue
+            for deco in node.decorator_list:
+                if (
+                    isinstance(deco, ast.Call)
+                    and getattr(deco.func, "id", None) == "handle"
+                    and len(deco.args) == 2
+                ):
+                    keyword, pattern = (ast.literal_eval(arg) for arg in deco.args)
+                    key_patterns.append((keyword, re.compile(pattern)))
+    return key_patterns
+
+
+def loop_search(
+    key_patterns: list[tuple[str, Pattern[str]]], text: str
+) -> tuple[str, Match[str]] | None:
+    """改动前 on_message 的匹配方式：按关键词长度降序逐个判断"""
+    for kw, pat in key_patterns:
+        if kw not in text:
+            continue
+        if m := pat.search(text):
+            return kw, m
+    return None
+
+
+def make_messages(count: int, link_ratio: float, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = rng.choices(CHAT_WORDS, k=rng.randint(3, 20))
+        if rng.random() < link_ratio:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(SAMPLE_LINKS))
+        messages.append(" ".join(words))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--link-ratio", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    key_patterns = sorted(load_key_patterns(), key=lambda x: -len(x[0]))
+    matcher = KeywordMatcher(key_patterns)
+    messages = make_messages(args.messages, args.link_ratio)
+
+    # 两种方式的结果必须一致
+    for text in messages:
+        old, new = loop_search(key_patterns, text), matcher.search(text)
+        assert (old and (old[0], old[1].group(0))) == (
+            new and (new[0], new[1].group(0))
+        ), text
+
+    def run_loop():
+        for text in messages:
+            loop_search(key_patterns, text)
+
+    def run_matcher():
+        for text in messages:
+            matcher.search(text)
+
+    print(
+        f"{len(key_patterns)} 个关键词-正则对，{len(messages)} 条消息，"
+        f"含链接比例 {args.link_ratio:.0%}"
+    )
+    for name, func in (("逐关键词遍历", run_loop), ("KeywordMatcher", run_matcher)):
+        best = min(timeit.repeat(func, number=10, repeat=args.repeat)) / 10
+        print(f"  {name:<16}{best / len(messages) * 1e6:8.2f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
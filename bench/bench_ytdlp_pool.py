@@ -0,0 +1,124 @@
+"""YoutubeDLPool 基准：每次新建 YoutubeDL vs 复用池中实例
+
+用法（仓库根目录，需在已安装 AstrBot 与 yt-dlp 的环境中运行）：
+    python bench/bench_ytdlp_pool.py [--calls 50] [--url URL]
+
+默认在本地起一个 HTTP 服务，提供含 <video> 的页面供通用提取器解析，
+测得的是提取器加载、Cookie 与网络组件初始化等固定开销，不受外网波动影响；
+两种方式的选项同 Downloader._ytdlp_extract_info（不含请求头与代理）
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    import yt_dlp
+
+    from core.ytdlp_pool import YoutubeDLPool, ydl_extract_info
+except ModuleNotFoundError as exc:
+    sys.exit(f"缺少依赖 {exc.name}，请在 AstrBot 环境中运行")
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>bench</title></head>
+<body><video src="/clip.mp4" controls></video></body></html>
+"""
+
+OPTS = {
+    "quiet": True,
+    "skip_download": True,
+    "force_generic_extractor": True,
+    "cookiefile": None,
+    # 仅为输出整洁，不影响耗时
+    "no_warnings": True,
+}
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory: Path) -> ThreadingHTTPServer:
+    (directory / "index.html").write_text(PAGE, encoding="utf-8")
+    (directory / "clip.mp4").write_bytes(b"\0" * 1024)
+    handler = partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fresh_extract(url: str):
+    """改动前的方式：每次调用新建并关闭 YoutubeDL"""
+    with yt_dlp.YoutubeDL(dict(OPTS)) as ydl:
+        return ydl_extract_info(ydl, url)
+
+
+async def measure(call, calls: int) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        info = await call()
+        timings.append(time.perf_counter() - start)
+        assert info, "提取失败"
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p90 = timings[int(len(timings) * 0.9) - 1] if len(timings) >= 10 else timings[-1]
+    print(
+        f"  {name:<14}中位数 {statistics.median(timings) * 1e3:7.1f} ms，"
+        f"P90 {p90 * 1e3:7.1f} ms"
+    )
+
+
+async def run(url: str, calls: int):
+    pool = YoutubeDLPool({"ytdlp_pool_size": 2, "ytdlp_pool_max_uses": calls + 1})
+    try:
+        # 预热一次，两种方式都不计入 import 与首个提取器加载
+        await asyncio.to_thread(fresh_extract, url)
+        await pool.run(dict(OPTS), ydl_extract_info, url)
+
+        fresh = await measure(lambda: asyncio.to_thread(fresh_extract, url), calls)
+        pooled = await measure(
+            lambda: pool.run(dict(OPTS), ydl_extract_info, url), calls
+        )
+    finally:
+        pool.close()
+    print(f"{url}，每种方式 {calls} 次提取")
+    report("每次新建", fresh)
+    report("YoutubeDLPool", pooled)
+    print(f"  池实例：新建 {pool.created}，复用 {pool.reused}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--url", help="改用指定地址（需联网），默认使用本地页面")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, args.calls))
+        return
+    with TemporaryDirectory() as tmp:
+        server = serve(Path(tmp))
+        try:
+            port = server.server_address[1]
+            asyncio.run(run(f"http://127.0.0.1:{port}/index.html", args.calls))
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
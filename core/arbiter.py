@@ -14,6 +14,16 @@ EmojiLikeArbiter 协议实现（生产级）
 - 同一排序规则
 - 同一固定时间窗口
 
+独占快速通道（可选）：
+- 群内连续 N 轮仅观测到自身参与时，仍占坑（供他人 Phase 1 检测），但跳过窗口等待
+- 后台延迟复查参与者，一旦出现其他 Bot 即退回完整仲裁
+
+自适应模式（可选）：
+- 仅改变本地“何时去看”的等待策略，不改变排序规则与信号语义
+- 仲裁窗口始终等满协议固定窗口：他人占坑可能在窗口内任意时刻落地，
+  本地无从得知他人的延迟，提前结束会漏掉参与者、出现多个胜出者
+- 递补确认阶段短间隔轮询，确认信号只增不减，观测到即可返回
+
 ⚠️ 本文件【不依赖任何机器人框架】
 ⚠️ 仅假设 bot 对象支持 CQHTTP 标准 action
 """
@@ -21,6 +31,7 @@ EmojiLikeArbiter 协议实现（生产级）
 from __future__ import annotations
 
 import asyncio
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any
 
@@ -40,6 +51,8 @@ class ArbiterContext:
     message_id: int
     msg_time: int
     self_id: int
+    group_id: int | None = None
+    """仅用于本地统计（独占快速通道），不参与仲裁"""
 
 
 # ======================================================================
@@ -69,23 +82,50 @@ class EmojiLikeArbiter:
 
     _TIME_SLICE = 60
 
+    # ================= 自适应等待（仅影响本地轮询节奏） =================
+
+    _POLL_SCHEDULE = (0.1, 0.15, 0.2, 0.25)
+    """轮询间隔退避序列，末项重复使用"""
+    _MAX_GROUPS = 1000
+    """独占轮次记录的群数上限"""
+
+    def __init__(self, adaptive: bool = False, solo_rounds: int = 0):
+        self.adaptive = adaptive
+        # 连续独占多少轮后进入快速通道，0 表示不启用
+        self.solo_rounds = solo_rounds
+        # {group_id: 连续独占轮次}
+        self._solo: OrderedDict[int, int] = OrderedDict()
+        self._background: set[asyncio.Task] = set()
+
     # ================= 对外唯一入口 =================
 
-    async def compete(self, bot: Any, ctx: ArbiterContext) -> bool:
+    async def compete(
+        self,
+        bot: Any,
+        ctx: ArbiterContext,
+        timings: dict[str, float] | None = None,
+    ) -> bool:
         """
         执行一次完整的 EmojiLikeArbiter 仲裁流程。
 
         :param bot: 任意 CQHTTP Bot（支持 set_msg_emoji_like / fetch_emoji_like）
         :param ctx: 仲裁上下文（由框架侧构造）
+        :param timings: 可选，传入时写入各阶段耗时（秒）
         :return: 当前 Bot 是否为实际胜出者
         """
 
         mid = ctx.message_id
+        timer = _PhaseTimer(timings)
 
         # Phase 1：初始窗口检测
-        if await self._fetch_users(bot, mid, self._EMOJI_ID, self._EMOJI_TYPE):
+        existing = await self._fetch_users(bot, mid, self._EMOJI_ID, self._EMOJI_TYPE)
+        timer.mark("detect")
+        if existing:
+            self._observe_participants(ctx, existing)
             return False
 
+        fast_path = self.is_fast_path(ctx.group_id)
+
         # Phase 2：占坑
         try:
             await bot.set_msg_emoji_like(
@@ -96,15 +136,23 @@ class EmojiLikeArbiter:
             )
         except Exception:
             return False
+        timer.mark("claim")
 
-        # Phase 3：仲裁窗口等待
-        await asyncio.sleep(self._WAIT_SEC)
+        # Fast-Path：独占群跳过窗口等待，后台复查参与者
+        if fast_path:
+            task = asyncio.create_task(self._recheck_solo(bot, ctx))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return True
 
-        # Phase 4：参与者收集
+        # Phase 3 + 4：仲裁窗口等待 + 参与者收集（自适应模式同样等满窗口）
+        await asyncio.sleep(self._WAIT_SEC)
         users = await self._fetch_users(bot, mid, self._EMOJI_ID, self._EMOJI_TYPE)
+        timer.mark("window")
         if not users:
             # 极端 API 延迟兜底：视为成功
             return True
+        self._observe_participants(ctx, users)
 
         # Phase 5：胜出顺序计算（仅一次）
         order = self._decide_order(users, ctx.msg_time)
@@ -116,24 +164,32 @@ class EmojiLikeArbiter:
             return order[0] == ctx.self_id
 
         # Phase 6：确定性递补确认
-        for candidate in order:
-            if candidate == ctx.self_id:
-                try:
-                    await bot.set_msg_emoji_like(
-                        message_id=mid,
-                        emoji_id=self._FEEDBACK_EMOJI_ID,
-                        emoji_type=self._FEEDBACK_EMOJI_TYPE,
-                        set=True,
-                    )
-                except Exception:
-                    pass
-
-            await asyncio.sleep(self._FEEDBACK_WAIT_SEC)
-
-            if await self._has_feedback(bot, mid):
-                return candidate == ctx.self_id
+        try:
+            for candidate in order:
+                if candidate == ctx.self_id:
+                    try:
+                        await bot.set_msg_emoji_like(
+                            message_id=mid,
+                            emoji_id=self._FEEDBACK_EMOJI_ID,
+                            emoji_type=self._FEEDBACK_EMOJI_TYPE,
+                            set=True,
+                        )
+                    except Exception:
+                        pass
+
+                if self.adaptive:
+                    if await self._wait_feedback_adaptive(bot, ctx):
+                        return candidate == ctx.self_id
+                    continue
+
+                await asyncio.sleep(self._FEEDBACK_WAIT_SEC)
+
+                if await self._has_feedback(bot, ctx):
+                    return candidate == ctx.self_id
 
-        return False
+            return False
+        finally:
+            timer.mark("feedback")
 
     # ================= 内部方法 =================
 
@@ -167,13 +223,13 @@ class EmojiLikeArbiter:
 
         return users
 
-    async def _has_feedback(self, bot: Any, message_id: int) -> bool:
+    async def _has_feedback(self, bot: Any, ctx: ArbiterContext) -> bool:
         """
         判断是否观测到胜出确认信号（表情 124）。
         """
         users = await self._fetch_users(
             bot,
-            message_id,
+            ctx.message_id,
             self._FEEDBACK_EMOJI_ID,
             self._FEEDBACK_EMOJI_TYPE,
         )
@@ -196,3 +252,74 @@ class EmojiLikeArbiter:
             participants[(base + i) % len(participants)]
             for i in range(len(participants))
         ]
+
+    # ================= 独占快速通道 =================
+
+    def is_fast_path(self, group_id: int | None) -> bool:
+        """该群是否处于独占快速通道"""
+        if self.solo_rounds <= 0 or group_id is None:
+            return False
+        return self._solo.get(group_id, 0) >= self.solo_rounds
+
+    def fast_path_groups(self) -> dict[int, int]:
+        """已记录的群及其连续独占轮次"""
+        return dict(self._solo)
+
+    def _observe_participants(self, ctx: ArbiterContext, users: list[int]):
+        if self.solo_rounds <= 0 or ctx.group_id is None:
+            return
+        gid = ctx.group_id
+        if set(users) == {ctx.self_id}:
+            self._solo[gid] = self._solo.get(gid, 0) + 1
+        else:
+            self._solo[gid] = 0
+        self._solo.move_to_end(gid)
+        while len(self._solo) > self._MAX_GROUPS:
+            self._solo.popitem(last=False)
+
+    async def _recheck_solo(self, bot: Any, ctx: ArbiterContext):
+        """快速通道胜出后，按协议窗口复查参与者，出现其他 Bot 即退出快速通道"""
+        await asyncio.sleep(self._WAIT_SEC)
+        users = await self._fetch_users(
+            bot, ctx.message_id, self._EMOJI_ID, self._EMOJI_TYPE
+        )
+        if users:
+            self._observe_participants(ctx, users)
+
+    # ================= 自适应等待 =================
+
+    def _poll_delays(self):
+        yield from self._POLL_SCHEDULE
+        while True:
+            yield self._POLL_SCHEDULE[-1]
+
+    async def _wait_feedback_adaptive(self, bot: Any, ctx: ArbiterContext) -> bool:
+        """
+        在递补窗口内轮询确认信号，观测到即返回；信号只增不减，提前返回不影响结果。
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for delay in self._poll_delays():
+            remaining = self._FEEDBACK_WAIT_SEC - (loop.time() - start)
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(delay, remaining))
+            if await self._has_feedback(bot, ctx):
+                return True
+        return False
+
+
+class _PhaseTimer:
+    """阶段计时，写入调用方提供的 dict"""
+
+    def __init__(self, timings: dict[str, float] | None):
+        self._timings = timings
+        self._loop = asyncio.get_running_loop()
+        self._last = self._loop.time()
+
+    def mark(self, phase: str):
+        if self._timings is None:
+            return
+        now = self._loop.time()
+        self._timings[phase] = round(now - self._last, 4)
+        self._last = now
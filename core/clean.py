@@ -1,7 +1,5 @@
 import asyncio
-import shutil
 import zoneinfo
-from pathlib import Path
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -10,17 +8,27 @@ from astrbot.api import logger
 from astrbot.core.config.astrbot_config import AstrBotConfig
 from astrbot.core.star.context import Context
 
+from .media_cache import MediaCache
+from .utils import safe_unlink
+
 
 class CacheCleaner:
     """
-    每天固定时间自动清理插件缓存目录的调度器封装。
+    媒体缓存的后台清理：
+    - 后台循环定期检查，超过高水位时按 LRU 淘汰到低水位
+    - 写入使占用超过高水位时立即唤醒清理（MediaCache.pressure）
+    - 按 Cron 周期重新扫描缓存目录，与磁盘对账
+    - 定期将缓存索引的变更落盘
     """
 
     JOBNAME = "CacheCleaner"
+    SWEEP_INTERVAL = 60
 
-    def __init__(self, context: Context, config: AstrBotConfig):
+    def __init__(self, context: Context, config: AstrBotConfig, cache: MediaCache):
         self.clean_cron = config["clean_cron"]
-        self.cache_dir = Path(config["cache_dir"])
+        self.cache = cache
+        self._task: asyncio.Task | None = None
+        self.sweeps = 0
 
         tz = context.get_config().get("timezone")
         self.timezone = (
@@ -31,13 +39,15 @@ class CacheCleaner:
 
         self.register_task()
 
-        logger.info(f"{self.JOBNAME} 已启动，任务周期：{self.clean_cron}")
+        logger.info(f"{self.JOBNAME} 已启动，对账周期：{self.clean_cron}")
 
     def register_task(self):
+        if not self.clean_cron:
+            return
         try:
             self.trigger = CronTrigger.from_crontab(self.clean_cron)
             self.scheduler.add_job(
-                func=self._clean_plugin_cache,
+                func=self.rescan,
                 trigger=self.trigger,
                 name=f"{self.JOBNAME}_scheduler",
                 max_instances=1,
@@ -45,16 +55,53 @@ class CacheCleaner:
         except Exception as e:
             logger.error(f"[{self.JOBNAME}] Cron 格式错误：{e}")
 
-    async def _clean_plugin_cache(self) -> None:
-        """删除并重建缓存目录"""
-        loop = asyncio.get_running_loop()
+    async def start(self):
+        """启动时加载索引并对账一次，再开始后台清理"""
+        await self.cache.load()
+        await self.rescan()
+        self._task = asyncio.create_task(self._run(), name=self.JOBNAME)
+
+    async def rescan(self) -> None:
+        """重新扫描缓存目录，删除与索引不符的文件并按需清理"""
         try:
-            await loop.run_in_executor(None, shutil.rmtree, self.cache_dir)
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
-            logger.info("Cache directory cleaned and recreated.")
+            if invalid := await self.cache.rescan():
+                await asyncio.gather(*(safe_unlink(p) for p in invalid))
+                logger.warning(
+                    f"[{self.JOBNAME}] 删除 {len(invalid)} 个与索引不符的缓存文件"
+                )
+            await self.sweep()
+            await self.cache.save()
         except Exception:
-            logger.exception("Error while cleaning cache directory.")
+            logger.exception("Error while rescanning cache directory.")
+
+    async def sweep(self) -> None:
+        """淘汰最久未访问的文件，直到占用低于低水位"""
+        victims = self.cache.evict_candidates()
+        self.sweeps += 1
+        if not victims:
+            return
+        await asyncio.gather(*(safe_unlink(p) for p in victims))
+        logger.info(
+            f"[{self.JOBNAME}] 淘汰 {len(victims)} 个缓存文件，"
+            f"当前占用 {self.cache.usage / 1024 / 1024:.1f} MB"
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.cache.pressure.wait(), self.SWEEP_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.cache.pressure.clear()
+            try:
+                await self.sweep()
+                await self.cache.save()
+            except Exception:
+                logger.exception("Error while sweeping cache directory.")
 
     async def stop(self):
         self.scheduler.remove_all_jobs()
+        if self._task is not None:
+            self._task.cancel()
+        await self.cache.save()
         logger.info(f"[{self.JOBNAME}] 已停止")
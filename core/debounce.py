@@ -1,6 +1,11 @@
 # debounce.py
 
+import json
 import time
+from collections import OrderedDict
+from pathlib import Path
+
+from astrbot.api import logger
 
 
 class Debouncer:
@@ -8,11 +13,67 @@ class Debouncer:
     会话级防抖器
     - 支持 link 防抖
     - 支持 resource_id 防抖
+    - 所有记录共用同一防抖时长，插入顺序即过期顺序，过期清理均摊 O(1)
+    - 限制总记录数与会话数，超出时淘汰最早记录 / 最久未活跃的会话
+    - 可选持久化，重启后防抖窗口延续
     """
 
+    MAX_KEYS = 50000
+    MAX_SESSIONS = 10000
+    STATE_FILE = "debounce_state.json"
+
     def __init__(self, config: dict):
         self.interval = config["debounce_interval"]
-        self._cache: dict[str, dict[str, float]] = {}  # {session: {key: ts}}
+        self.max_keys: int = config.get("debounce_max_keys", self.MAX_KEYS)
+        self.max_sessions: int = config.get("debounce_max_sessions", self.MAX_SESSIONS)
+        # {(session, key): ts}，按时间先后排列
+        self._records: OrderedDict[tuple[str, str], float] = OrderedDict()
+        # {session: {key, ...}}，按最近活跃排列
+        self._sessions: OrderedDict[str, set[str]] = OrderedDict()
+
+        self._state_file: Path | None = None
+        if config.get("debounce_persist", False) and config.get("data_dir"):
+            self._state_file = Path(config["data_dir"]) / self.STATE_FILE
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _expire(self, now: float):
+        """从队首清理过期记录"""
+        expire = now - self.interval
+        records = self._records
+        while records:
+            (session, key), ts = next(iter(records.items()))
+            if ts >= expire:
+                break
+            self._drop(session, key)
+
+    def _drop(self, session: str, key: str):
+        self._records.pop((session, key), None)
+        if (keys := self._sessions.get(session)) is not None:
+            keys.discard(key)
+            if not keys:
+                del self._sessions[session]
+
+    def _evict_session(self, session: str):
+        for key in self._sessions.pop(session, ()):
+            self._records.pop((session, key), None)
+
+    def _record(self, session: str, key: str, ts: float):
+        keys = self._sessions.get(session)
+        if keys is None:
+            keys = self._sessions[session] = set()
+        else:
+            self._sessions.move_to_end(session)
+        keys.add(key)
+        self._records[(session, key)] = ts
+
+        # 容量限制
+        while len(self._sessions) > self.max_sessions:
+            self._evict_session(next(iter(self._sessions)))
+        while len(self._records) > self.max_keys:
+            self._drop(*next(iter(self._records)))
 
     def _hit(self, session: str, key: str) -> bool:
         # 禁用
@@ -20,20 +81,17 @@ class Debouncer:
             return False
 
         now = time.time()
-        bucket = self._cache.setdefault(session, {})
 
         # 1. 清理过期
-        expire = now - self.interval
-        for k, ts in list(bucket.items()):
-            if ts < expire:
-                bucket.pop(k, None)
+        self._expire(now)
 
         # 2. 命中判断
-        if key in bucket:
+        if (session, key) in self._records:
+            self._sessions.move_to_end(session)
             return True
 
         # 3. 记录
-        bucket[key] = now
+        self._record(session, key, now)
         return False
 
     def hit_link(self, session: str, link: str) -> bool:
@@ -43,3 +101,31 @@ class Debouncer:
     def hit_resource(self, session: str, resource_id: str) -> bool:
         """基于资源 ID 的防抖"""
         return self._hit(session, f"res:{resource_id}")
+
+    def load(self):
+        """从状态文件恢复未过期的记录"""
+        if not self._state_file or not self._state_file.is_file():
+            return
+        try:
+            items = json.loads(self._state_file.read_text(encoding="utf-8"))
+        except Exception:
+            logger.warning(f"防抖状态文件读取失败: {self._state_file}")
+            return
+        expire = time.time() - self.interval
+        for session, key, ts in sorted(items, key=lambda x: x[2]):
+            if ts >= expire:
+                self._record(session, key, ts)
+        logger.debug(f"已恢复 {len(self._records)} 条防抖记录")
+
+    def save(self):
+        """将未过期的记录写入状态文件"""
+        if not self._state_file or self.interval <= 0:
+            return
+        self._expire(time.time())
+        items = [[session, key, ts] for (session, key), ts in self._records.items()]
+        try:
+            tmp = self._state_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self._state_file)
+        except Exception:
+            logger.warning(f"防抖状态文件写入失败: {self._state_file}")
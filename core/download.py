@@ -1,12 +1,28 @@
-from asyncio import Task, TimeoutError, create_task, gather, sleep, to_thread
+import os
+import time
+from asyncio import (
+    FIRST_EXCEPTION,
+    BaseTransport,
+    Event,
+    Protocol,
+    Task,
+    TimeoutError,
+    WriteTransport,
+    create_task,
+    gather,
+    get_running_loop,
+    sleep,
+    to_thread,
+    wait,
+)
 from collections.abc import Callable, Coroutine
+from contextvars import ContextVar
 from functools import wraps
 from pathlib import Path
-from typing import Any, ParamSpec, TypeVar
+from typing import Any, BinaryIO, ParamSpec, TypeVar
 
 import aiofiles
-import yt_dlp
-from aiohttp import ClientError, ClientSession, ClientTimeout
+from aiohttp import ClientError, ClientResponse
 from msgspec import Struct, convert
 from tqdm.asyncio import tqdm
 
@@ -21,24 +37,193 @@ from .exception import (
     SizeLimitException,
     ZeroSizeException,
 )
-from .utils import LimitedSizeDict, generate_file_name, merge_av, safe_unlink
+from .http import HttpClientPool
+from .info_cache import InfoCache
+from .media_cache import MediaCache
+from .scheduler import DownloadPriority, DownloadScheduler, FFmpegPool
+from .singleflight import SingleFlight
+from .utils import (
+    LimitedSizeDict,
+    commit_tmp,
+    discard_tmp,
+    generate_file_name,
+    merge_av,
+    merge_av_pipes,
+    safe_unlink,
+    sweep_tmp_files,
+    tmp_path_for,
+)
+from .ytdlp_pool import YoutubeDLPool, ydl_download, ydl_extract_info
 
 P = ParamSpec("P")
 T = TypeVar("T")
 
 
+class DownloadGate:
+    """下载闸门：闸门打开前，在其上下文中创建的下载任务保持等待"""
+
+    def __init__(self):
+        self._opened = Event()
+        self._tasks: set[Task] = set()
+
+    def track(self, task: Task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def wait(self):
+        await self._opened.wait()
+
+    def open(self):
+        """放行所有等待中的下载"""
+        self._opened.set()
+
+    def cancel(self):
+        """取消所有未完成的下载"""
+        for task in list(self._tasks):
+            task.cancel()
+
+
+download_gate: ContextVar[DownloadGate | None] = ContextVar(
+    "download_gate", default=None
+)
+"""当前上下文的下载闸门, 由 auto_task 创建的任务继承"""
+
+download_platform: ContextVar[str | None] = ContextVar(
+    "download_platform", default=None
+)
+"""当前上下文所属平台, 用于按平台选择下载策略、登记缓存来源"""
+
+download_resource: ContextVar[str | None] = ContextVar(
+    "download_resource", default=None
+)
+"""当前上下文所属资源（解析结果缓存键）, 登记到缓存索引"""
+
+
+class _RangeUnsupported(Exception):
+    """服务器未按 Range 返回 206, 需退回单连接下载"""
+
+
 def auto_task(func: Callable[P, Coroutine[Any, Any, T]]) -> Callable[P, Task[T]]:
-    """装饰器：自动将异步函数调用转换为 Task, 完整保留类型提示"""
+    """装饰器：自动将异步函数调用转换为 Task, 完整保留类型提示
+
+    当前上下文存在下载闸门时，任务先等待闸门打开再执行
+    """
 
     @wraps(func)
     def wrapper(*args: P.args, **kwargs: P.kwargs) -> Task[T]:
-        coro = func(*args, **kwargs)
         name = " | ".join(str(arg) for arg in args if isinstance(arg, str))
-        return create_task(coro, name=func.__name__ + " | " + name)
+        name = func.__name__ + " | " + name
+        gate = download_gate.get()
+        if gate is None:
+            return create_task(func(*args, **kwargs), name=name)
+
+        async def gated() -> T:
+            await gate.wait()
+            return await func(*args, **kwargs)
+
+        task = create_task(gated(), name=name)
+        gate.track(task)
+        return task
 
     return wrapper
 
 
+class _Partial:
+    """一次下载在多次重试间保留的进度，用于断点续传"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.url: str = ""
+        """分段下载使用的地址（重定向后）"""
+        self.total: int | None = None
+        self.validator: str | None = None
+        """If-Range 校验值：强 ETag 或 Last-Modified"""
+        self.written = 0
+        """单连接模式下已写入的字节数"""
+        self.ranges: list[list[int]] | None = None
+        """分段模式下各段的 [下一个写入位置, 结束位置]"""
+
+    @property
+    def resumable(self) -> bool:
+        return self.validator is not None and (
+            self.written > 0 or self.ranges is not None
+        )
+
+    @property
+    def downloaded(self) -> int:
+        if self.ranges is None:
+            return self.written
+        remaining = sum(end + 1 - pos for pos, end in self.ranges)
+        return (self.total or 0) - remaining
+
+    def plan_ranges(self, url: str, total: int, segments: int):
+        self.url = url
+        size = -(-total // segments)
+        self.ranges = [
+            [start, min(start + size, total) - 1] for start in range(0, total, size)
+        ]
+
+
+def _validator(response: ClientResponse) -> str | None:
+    """取 If-Range 可用的校验值，弱 ETag 不能用于 If-Range"""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _content_range_start(response: ClientResponse) -> int | None:
+    """解析 Content-Range: bytes start-end/total 的起始位置"""
+    value = response.headers.get("Content-Range", "")
+    unit, _, spec = value.partition(" ")
+    if unit != "bytes":
+        return None
+    try:
+        return int(spec.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def _preallocate(path: Path, size: int):
+    """预分配文件大小，供分段按偏移写入"""
+    with path.open("wb") as file:
+        file.truncate(size)
+
+
+class _PipeWriter(Protocol):
+    """管道写端，按传输层水位反压，读端关闭后写入报错"""
+
+    def __init__(self):
+        self.transport: WriteTransport | None = None
+        self._writable = Event()
+        self._writable.set()
+        self._lost: BaseException | None = None
+
+    def connection_made(self, transport: BaseTransport):
+        assert isinstance(transport, WriteTransport)
+        self.transport = transport
+
+    def pause_writing(self):
+        self._writable.clear()
+
+    def resume_writing(self):
+        self._writable.set()
+
+    def connection_lost(self, exc: Exception | None):
+        self._lost = exc or BrokenPipeError()
+        self._writable.set()
+
+    async def write(self, data: bytes):
+        if self._lost is not None or self.transport is None:
+            raise BrokenPipeError
+        self.transport.write(data)
+        await self._writable.wait()
+        if self._lost is not None:
+            raise BrokenPipeError from self._lost
+
+
 class VideoInfo(Struct):
     title: str
     """标题"""
@@ -65,6 +250,9 @@ class VideoInfo(Struct):
 class Downloader:
     """下载器，支持youtube-dlp 和 流式下载"""
 
+    FORMAT_INFO_TTL = 600
+    """格式列表的提取结果可用于下载的时长（秒），需短于媒体地址的签名有效期"""
+
     def __init__(self, config: AstrBotConfig):
         self.config = config
         self.cache_dir = Path(config["cache_dir"])
@@ -73,11 +261,40 @@ class Downloader:
         self.max_size = self.config["source_max_size"]
         self.headers: dict[str, str] = COMMON_HEADER.copy()
         # 视频信息缓存
-        self.info_cache: LimitedSizeDict[str, VideoInfo] = LimitedSizeDict()
-        # 用于流式下载的客户端
-        self.client = ClientSession(
-            timeout=ClientTimeout(total=config["download_timeout"])
+        self.info_cache: InfoCache[VideoInfo] = InfoCache(config, VideoInfo)
+        # 完整提取结果 {url: (过期时间, info dict)}，供格式列表与随后的指定格式下载共用
+        self.format_infos: LimitedSizeDict[str, tuple[float, dict[str, Any]]] = (
+            LimitedSizeDict()
+        )
+        # 进行中的下载，key 为目标文件路径，同一目标并发请求共享一次下载
+        self.inflight: SingleFlight[Path] = SingleFlight()
+        # 缓存目录容量管理（LRU）
+        self.media_cache = MediaCache(config)
+        # {平台: 规范媒体键函数}，由各解析器提供，用于签名 / 过期 url 的缓存命名
+        self.media_keys: dict[str, Callable[[str], str | None]] = {}
+        # 分段下载：{平台: (分段数, 启用阈值字节)}，未列出的平台使用全局设置
+        self.segments: int = config.get("download_segments", 4)
+        self.segment_threshold: int = (
+            config.get("download_segment_threshold", 16) * 1024 * 1024
+        )
+        self.segment_platforms = self._parse_segment_platforms(
+            config.get("download_segment_platforms", [])
         )
+        # 音视频分轨边下载边经管道交给 ffmpeg 合并
+        self.pipeline_merge: bool = config.get("download_pipeline_merge", True)
+        # 清理上次异常退出残留的临时文件，保证缓存目录中的目标文件都是完整的
+        if swept := sweep_tmp_files(self.cache_dir):
+            logger.info(f"已清理 {swept} 个残留的临时下载文件")
+        # 下载优先级与带宽调度
+        self.scheduler = DownloadScheduler(config)
+        # ffmpeg 任务执行器（合并 / 转码）
+        self.ffmpeg = FFmpegPool(config)
+        # 复用的 YoutubeDL 实例
+        self.ytdlp = YoutubeDLPool(config)
+        # 下载器与各解析器共享的连接池
+        self.http = HttpClientPool(config)
+        # 用于流式下载的客户端
+        self.client = self.http.session("media")
 
     @auto_task
     async def streamd(
@@ -87,6 +304,7 @@ class Downloader:
         file_name: str | None = None,
         ext_headers: dict[str, str] | None = None,
         proxy: str | None | object = ...,
+        priority: DownloadPriority = DownloadPriority.LIGHT,
     ) -> Path:
         """download file by url with stream
 
@@ -95,6 +313,7 @@ class Downloader:
             file_name (str | None): file name. Defaults to generate_file_name.
             ext_headers (dict[str, str] | None): ext headers. Defaults to None.
             proxy (str | None): proxy URL. Defaults to configured proxy. Use None to disable proxy.
+            priority (DownloadPriority): download priority. Defaults to LIGHT.
 
         Returns:
             Path: file path
@@ -104,10 +323,10 @@ class Downloader:
         """
 
         if not file_name:
-            file_name = generate_file_name(url)
+            file_name = self.media_file_name(url)
         file_path = self.cache_dir / file_name
         # 如果文件存在，则直接返回
-        if file_path.exists():
+        if self.media_cache.hit(file_path):
             return file_path
 
         headers = {**self.headers, **(ext_headers or {})}
@@ -116,57 +335,323 @@ class Downloader:
         if proxy is ...:
             proxy = self.proxy
 
-        retries = 2
-        for attempt in range(retries + 1):
-            try:
-                async with self.client.get(
-                    url, headers=headers, allow_redirects=True, proxy=proxy
-                ) as response:
-                    if response.status >= 400:
-                        raise ClientError(f"HTTP {response.status} {response.reason}")
-                    content_length = response.content_length
-                    max_bytes = self.max_size * 1024 * 1024
-
-                    if content_length == 0:
-                        logger.warning(f"媒体 url: {url}, 大小为 0, 取消下载")
-                        raise ZeroSizeException
-                    if content_length and content_length > max_bytes:
-                        logger.warning(
-                            f"媒体 url: {url} 大小 {content_length / 1024 / 1024:.2f} MB 超过 {self.max_size} MB, 取消下载"
-                        )
-                        raise SizeLimitException
+        return await self.download_once(
+            file_path,
+            lambda: self._streamd(url, file_path, headers, proxy, priority),
+            url,
+        )
 
-                    downloaded = 0
-                    with self.get_progress_bar(file_name, content_length) as bar:
-                        async with aiofiles.open(file_path, "wb") as file:
-                            async for chunk in response.content.iter_chunked(
-                                1024 * 1024
-                            ):
-                                downloaded += len(chunk)
-                                if downloaded > max_bytes:
-                                    raise SizeLimitException
-                                await file.write(chunk)
-                                bar.update(len(chunk))
-
-                    if downloaded == 0:
-                        logger.warning(f"媒体 url: {url}, 实际大小为 0, 取消下载")
-                        raise ZeroSizeException
-                    if content_length and downloaded < content_length:
-                        raise ClientError(
-                            f"HTTP payload incomplete {downloaded}/{content_length}"
-                        )
+    async def _streamd(
+        self,
+        url: str,
+        file_path: Path,
+        headers: dict[str, str],
+        proxy: str | None | object,
+        priority: DownloadPriority,
+    ) -> Path:
+        """下载到临时文件，完成后原子替换为 file_path, 由 streamd 保证同一目标只有一个下载在进行
 
-                return file_path
-            except (ZeroSizeException, SizeLimitException):
-                await safe_unlink(file_path)
-                raise
+        服务器声明 Accept-Ranges 且文件超过阈值时分段并发下载，否则单连接流式下载；
+        重试时以 Range + If-Range 从已写入处续传，服务器拒绝续传才从头下载
+        """
+        async with self.scheduler.slot(priority):
+            return await self._streamd_attempts(url, file_path, headers, proxy, priority)
+
+    async def _streamd_attempts(
+        self,
+        url: str,
+        file_path: Path,
+        headers: dict[str, str],
+        proxy: str | None | object,
+        priority: DownloadPriority,
+    ) -> Path:
+        tmp_path = tmp_path_for(file_path)
+        segments, threshold = self._segment_policy()
+        partial = _Partial()
+        retries = 2
+        attempt = 0
+        progress = 0
+        while True:
+            try:
+                if partial.ranges is None:
+                    await self._stream_or_probe(
+                        url,
+                        tmp_path,
+                        file_path.name,
+                        partial,
+                        segments,
+                        threshold,
+                        headers,
+                        proxy,
+                        priority,
+                    )
+                if partial.ranges is not None:
+                    await self._download_ranges(
+                        tmp_path, file_path.name, partial, headers, proxy, priority
+                    )
+                return await commit_tmp(tmp_path, file_path)
+            except _RangeUnsupported:
+                await safe_unlink(tmp_path)
+                logger.debug(f"分段下载不可用, 退回单连接下载 | url: {url}")
+                partial = _Partial()
+                segments = 1
             except (ClientError, TimeoutError) as exc:
-                await safe_unlink(file_path)
+                if not partial.resumable:
+                    await safe_unlink(tmp_path)
+                    partial = _Partial()
+                elif partial.downloaded > progress:
+                    # 续传有进展则不计入重试次数，只要每次都有推进就能最终完成
+                    progress = partial.downloaded
+                    attempt = 0
                 if attempt < retries:
-                    await sleep(1 + attempt)
+                    attempt += 1
+                    await sleep(attempt)
                     continue
+                await safe_unlink(tmp_path)
                 logger.exception(f"下载失败 | url: {url}, file_path: {file_path}")
                 raise DownloadException("媒体下载失败") from exc
+            except BaseException:
+                await safe_unlink(tmp_path)
+                raise
+
+    async def _stream_or_probe(
+        self,
+        url: str,
+        tmp_path: Path,
+        file_name: str,
+        partial: _Partial,
+        segments: int,
+        threshold: int,
+        headers: dict[str, str],
+        proxy: str | None | object,
+        priority: DownloadPriority,
+    ):
+        """发起请求：可续传时从断点继续写入；满足分段条件时只记录分段计划，否则单连接写入"""
+        if partial.written:
+            headers = {
+                **headers,
+                "Range": f"bytes={partial.written}-",
+                "If-Range": partial.validator or "",  # resumable 保证非空
+            }
+        async with self.client.get(
+            url, headers=headers, allow_redirects=True, proxy=proxy
+        ) as response:
+            if partial.written:
+                if (
+                    response.status == 206
+                    and _content_range_start(response) == partial.written
+                ):
+                    logger.debug(f"从 {partial.written} 字节处续传 | url: {url}")
+                    await self._stream_body(
+                        url, response, tmp_path, file_name, partial, priority
+                    )
+                    return
+                # 资源已变化或服务器不接受 Range，从头下载
+                logger.debug(f"服务器拒绝续传 ({response.status}), 从头下载 | url: {url}")
+                partial.reset()
+
+            content_length = self._check_response(url, response)
+            partial.total = content_length
+            partial.validator = _validator(response)
+            if (
+                segments > 1
+                and content_length
+                and content_length >= threshold
+                and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                and not response.headers.get("Content-Encoding")
+            ):
+                # 分段请求直接使用重定向后的地址
+                partial.plan_ranges(str(response.url), content_length, segments)
+                await to_thread(_preallocate, tmp_path, content_length)
+                return
+            await self._stream_body(
+                url, response, tmp_path, file_name, partial, priority
+            )
+
+    def _check_response(self, url: str, response: ClientResponse) -> int | None:
+        """校验响应状态与声明大小，返回 Content-Length"""
+        if response.status >= 400:
+            raise ClientError(f"HTTP {response.status} {response.reason}")
+        content_length = response.content_length
+        if content_length == 0:
+            logger.warning(f"媒体 url: {url}, 大小为 0, 取消下载")
+            raise ZeroSizeException
+        if content_length and content_length > self.max_size * 1024 * 1024:
+            logger.warning(
+                f"媒体 url: {url} 大小 {content_length / 1024 / 1024:.2f} MB 超过 {self.max_size} MB, 取消下载"
+            )
+            raise SizeLimitException
+        return content_length
+
+    async def _stream_body(
+        self,
+        url: str,
+        response: ClientResponse,
+        tmp_path: Path,
+        file_name: str,
+        partial: _Partial,
+        priority: DownloadPriority,
+    ):
+        """单连接流式写入，partial.written 非 0 时追加写入"""
+        max_bytes = self.max_size * 1024 * 1024
+        priority = self._bandwidth_priority(priority, partial.total)
+        mode = "ab" if partial.written else "wb"
+        with self.get_progress_bar(file_name, partial.total) as bar:
+            bar.update(partial.written)
+            async with aiofiles.open(tmp_path, mode) as file:
+                async for chunk in response.content.iter_chunked(1024 * 1024):
+                    if partial.written + len(chunk) > max_bytes:
+                        raise SizeLimitException
+                    await self.scheduler.throttle(len(chunk), priority)
+                    await file.write(chunk)
+                    partial.written += len(chunk)
+                    bar.update(len(chunk))
+
+        if partial.written == 0:
+            logger.warning(f"媒体 url: {url}, 实际大小为 0, 取消下载")
+            raise ZeroSizeException
+        if partial.total and partial.written < partial.total:
+            raise ClientError(
+                f"HTTP payload incomplete {partial.written}/{partial.total}"
+            )
+
+    async def _download_ranges(
+        self,
+        tmp_path: Path,
+        file_name: str,
+        partial: _Partial,
+        headers: dict[str, str],
+        proxy: str | None | object,
+        priority: DownloadPriority,
+    ):
+        """按字节区间并发下载到预分配的文件，所有分段合计受 source_max_size 约束
+
+        各分段的写入进度记录在 partial 中，重试时只请求未完成的部分
+        """
+        assert partial.ranges is not None and partial.total
+        max_bytes = self.max_size * 1024 * 1024
+        downloaded = partial.downloaded
+        priority = self._bandwidth_priority(priority, partial.total)
+
+        async def fetch(segment: list[int], bar: tqdm):
+            nonlocal downloaded
+            pos, end = segment
+            range_headers = {**headers, "Range": f"bytes={pos}-{end}"}
+            if partial.validator:
+                range_headers["If-Range"] = partial.validator
+            async with self.client.get(
+                partial.url, headers=range_headers, allow_redirects=True, proxy=proxy
+            ) as response:
+                if response.status != 206 or _content_range_start(response) != pos:
+                    raise _RangeUnsupported
+                async with aiofiles.open(tmp_path, "r+b") as file:
+                    await file.seek(pos)
+                    async for chunk in response.content.iter_chunked(1024 * 1024):
+                        if segment[0] + len(chunk) > end + 1:
+                            raise ClientError("HTTP range overflow")
+                        downloaded += len(chunk)
+                        if downloaded > max_bytes:
+                            raise SizeLimitException
+                        await self.scheduler.throttle(len(chunk), priority)
+                        await file.write(chunk)
+                        segment[0] += len(chunk)
+                        bar.update(len(chunk))
+            if segment[0] != end + 1:
+                raise ClientError(
+                    f"HTTP range incomplete {segment[0] - pos}/{end - pos + 1}"
+                )
+
+        with self.get_progress_bar(file_name, partial.total) as bar:
+            bar.update(downloaded)
+            tasks = [
+                create_task(fetch(segment, bar))
+                for segment in partial.ranges
+                if segment[0] <= segment[1]
+            ]
+            try:
+                await gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await gather(*tasks, return_exceptions=True)
+
+    def _bandwidth_priority(
+        self, priority: DownloadPriority, total: int | None
+    ) -> DownloadPriority:
+        """按声明大小修正带宽优先级：大文件按重量媒体限速"""
+        if total and total >= self.scheduler.HEAVY_SIZE:
+            return DownloadPriority.HEAVY
+        return priority
+
+    def _segment_policy(self) -> tuple[int, int]:
+        """当前平台的 (分段数, 启用阈值字节)"""
+        platform = download_platform.get()
+        if platform is not None and platform in self.segment_platforms:
+            return self.segment_platforms[platform]
+        return self.segments, self.segment_threshold
+
+    def _parse_segment_platforms(
+        self, entries: list[str]
+    ) -> dict[str, tuple[int, int]]:
+        """解析 “平台=分段数[:阈值MB]” 形式的平台配置"""
+        policies: dict[str, tuple[int, int]] = {}
+        for entry in entries:
+            try:
+                platform, _, value = entry.partition("=")
+                segments, _, threshold = value.partition(":")
+                policies[platform.strip()] = (
+                    int(segments),
+                    int(threshold) * 1024 * 1024
+                    if threshold
+                    else self.segment_threshold,
+                )
+            except ValueError:
+                logger.warning(f"无效的分段下载平台配置: {entry}")
+        return policies
+
+    def media_file_name(self, url: str, default_suffix: str = "") -> str:
+        """缓存文件名：当前平台能给出规范媒体键时按键命名，
+        签名、过期参数不同的同一媒体落到同一文件；否则按完整 url 命名
+
+        Args:
+            url (str): url
+            default_suffix (str): 默认后缀. Defaults to "".
+
+        Returns:
+            str: 文件名
+        """
+        key = None
+        if (platform := download_platform.get()) and (
+            media_key := self.media_keys.get(platform)
+        ):
+            if key := media_key(url):
+                key = f"{platform}:{key}"
+        return generate_file_name(url, default_suffix, key)
+
+    async def download_once(
+        self,
+        path: Path,
+        func: Callable[[], Coroutine[Any, Any, Path]],
+        url: str | None = None,
+    ) -> Path:
+        """同一目标文件的并发请求共享一次下载，完成后登记到媒体缓存
+
+        Args:
+            path (Path): 目标文件路径
+            func (Callable): 实际执行下载的协程函数
+            url (str | None): 来源地址. Defaults to None.
+
+        Returns:
+            Path: 目标文件路径
+        """
+        path = await self.inflight.do(str(path), func)
+        self.media_cache.add(
+            path,
+            url=url,
+            platform=download_platform.get(),
+            resource=download_resource.get(),
+        )
+        return path
 
     @staticmethod
     def get_progress_bar(desc: str, total: int | None = None) -> tqdm:
@@ -220,9 +705,13 @@ class Downloader:
             return await self._ytdlp_download_video(url, cookiefile)
 
         if video_name is None:
-            video_name = generate_file_name(url, ".mp4")
+            video_name = self.media_file_name(url, ".mp4")
         return await self.streamd(
-            url, file_name=video_name, ext_headers=ext_headers, proxy=proxy
+            url,
+            file_name=video_name,
+            ext_headers=ext_headers,
+            proxy=proxy,
+            priority=DownloadPriority.HEAVY,
         )
 
     @auto_task
@@ -254,7 +743,7 @@ class Downloader:
             return await self._ytdlp_download_audio(url, cookiefile)
 
         if audio_name is None:
-            audio_name = generate_file_name(url, ".mp3")
+            audio_name = self.media_file_name(url, ".mp3")
         return await self.streamd(
             url, file_name=audio_name, ext_headers=ext_headers, proxy=proxy
         )
@@ -280,7 +769,7 @@ class Downloader:
             Path: file path
         """
         if file_name is None:
-            file_name = generate_file_name(url, ".zip")
+            file_name = self.media_file_name(url, ".zip")
         return await self.streamd(
             url, file_name=file_name, ext_headers=ext_headers, proxy=proxy
         )
@@ -309,9 +798,13 @@ class Downloader:
             httpx.HTTPError: When download fails
         """
         if img_name is None:
-            img_name = generate_file_name(url, ".jpg")
+            img_name = self.media_file_name(url, ".jpg")
         return await self.streamd(
-            url, file_name=img_name, ext_headers=ext_headers, proxy=proxy
+            url,
+            file_name=img_name,
+            ext_headers=ext_headers,
+            proxy=proxy,
+            priority=DownloadPriority.IMAGE,
         )
 
     async def download_imgs_without_raise(
@@ -362,20 +855,179 @@ class Downloader:
         Returns:
             Path: merged file path
         """
-        v_path, a_path = await gather(
-            self.download_video(v_url, ext_headers=ext_headers, proxy=proxy),
-            self.download_audio(a_url, ext_headers=ext_headers, proxy=proxy),
+        if self.media_cache.hit(output_path):
+            return output_path
+
+        headers = {**self.headers, **(ext_headers or {})}
+
+        async def download_and_merge() -> Path:
+            if self.pipeline_merge:
+                try:
+                    async with self.scheduler.slot(DownloadPriority.HEAVY):
+                        return await self._merge_pipelined(
+                            v_url,
+                            a_url,
+                            output_path,
+                            headers,
+                            self.proxy if proxy is ... else proxy,
+                        )
+                except (
+                    ClientError,
+                    TimeoutError,
+                    RuntimeError,
+                    BrokenPipeError,
+                ) as exc:
+                    # 网络中断无法续传到管道，输入不可顺序读取时 ffmpeg 也会失败，
+                    # 均退回先下载分轨再合并（分轨下载可续传）
+                    logger.warning(f"边下载边合并失败, 退回分轨下载: {exc}")
+            v_path, a_path = await gather(
+                self.download_video(v_url, ext_headers=ext_headers, proxy=proxy),
+                self.download_audio(a_url, ext_headers=ext_headers, proxy=proxy),
+            )
+            await merge_av(
+                v_path=v_path, a_path=a_path, output_path=output_path, pool=self.ffmpeg
+            )
+            # 合并后音视频分轨已删除
+            self.media_cache.discard(v_path)
+            self.media_cache.discard(a_path)
+            return output_path
+
+        return await self.download_once(output_path, download_and_merge, v_url)
+
+    async def _merge_pipelined(
+        self,
+        v_url: str,
+        a_url: str,
+        output_path: Path,
+        headers: dict[str, str],
+        proxy: str | None,
+    ) -> Path:
+        """音视频分轨各自写入管道，ffmpeg 同时读取并合并
+
+        ffmpeg 在首个字节到达后即开始工作，合并与较慢的一路下载重叠，
+        且分轨不落盘；任一路失败时取消其余任务并结束 ffmpeg
+        """
+        v_read, v_write = os.pipe()
+        a_read, a_write = os.pipe()
+        v_pipe = os.fdopen(v_write, "wb", buffering=0)
+        a_pipe = os.fdopen(a_write, "wb", buffering=0)
+        name = output_path.name
+        # ffmpeg 启动前不发起下载，避免连接空等读超时；
+        # 启动后管道读端即在本进程关闭，ffmpeg 提前退出时写端收到 EPIPE 而不是一直阻塞
+        started = Event()
+        # 两路都写完后 ffmpeg 只剩自身的收尾，执行器超时从此时开始计算
+        inputs_done = Event()
+        feeders = [
+            create_task(
+                self._feed_pipe(
+                    v_url,
+                    v_pipe,
+                    f"{name} [v]",
+                    headers,
+                    proxy,
+                    DownloadPriority.HEAVY,
+                    started,
+                )
+            ),
+            create_task(
+                self._feed_pipe(
+                    a_url,
+                    a_pipe,
+                    f"{name} [a]",
+                    headers,
+                    proxy,
+                    DownloadPriority.LIGHT,
+                    started,
+                )
+            ),
+        ]
+
+        def on_fed(_: Task):
+            if all(task.done() for task in feeders):
+                inputs_done.set()
+
+        for feeder in feeders:
+            feeder.add_done_callback(on_fed)
+        merge = create_task(
+            merge_av_pipes(
+                v_fd=v_read,
+                a_fd=a_read,
+                output_path=output_path,
+                pool=self.ffmpeg,
+                started=started,
+                input_done=inputs_done,
+            )
         )
-        await merge_av(v_path=v_path, a_path=a_path, output_path=output_path)
-        return output_path
+        tasks = [*feeders, merge]
+        try:
+            await wait(tasks, return_when=FIRST_EXCEPTION)
+            # 下载先失败时 ffmpeg 的报错只是输入被截断，优先抛出下载的异常
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception():
+                    raise task.exception()  # type: ignore[misc]
+            return output_path
+        finally:
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
+            v_pipe.close()
+            a_pipe.close()
+            if not started.is_set():
+                # ffmpeg 未启动，读端仍归本进程
+                os.close(v_read)
+                os.close(a_read)
+
+    async def _feed_pipe(
+        self,
+        url: str,
+        pipe: BinaryIO,
+        desc: str,
+        headers: dict[str, str],
+        proxy: str | None,
+        priority: DownloadPriority,
+        started: Event,
+    ):
+        """流式下载写入管道，大小限制与 streamd 一致；完成后关闭写端，ffmpeg 读到 EOF"""
+        loop = get_running_loop()
+        writer = _PipeWriter()
+        transport, _ = await loop.connect_write_pipe(lambda: writer, pipe)
+        try:
+            await started.wait()
+            async with self.client.get(
+                url, headers=headers, allow_redirects=True, proxy=proxy
+            ) as response:
+                total = self._check_response(url, response)
+                priority = self._bandwidth_priority(priority, total)
+                max_bytes = self.max_size * 1024 * 1024
+                written = 0
+                with self.get_progress_bar(desc, total) as bar:
+                    async for chunk in response.content.iter_chunked(1024 * 1024):
+                        if written + len(chunk) > max_bytes:
+                            raise SizeLimitException
+                        await self.scheduler.throttle(len(chunk), priority)
+                        await writer.write(chunk)
+                        written += len(chunk)
+                        bar.update(len(chunk))
+            if written == 0:
+                logger.warning(f"媒体 url: {url}, 实际大小为 0, 取消下载")
+                raise ZeroSizeException
+            if total and written < total:
+                raise ClientError(f"HTTP payload incomplete {written}/{total}")
+        finally:
+            transport.close()
 
     # region -------------------- 私有：yt-dlp --------------------
 
     async def ytdlp_extract_info(
         self, url: str, cookiefile: Path | None = None
     ) -> VideoInfo:
-        if (info := self.info_cache.get(url)) is not None:
-            return info
+        return await self.info_cache.get_or_extract(
+            url, lambda: self._ytdlp_extract_info(url, cookiefile)
+        )
+
+    async def _ytdlp_extract_info(
+        self, url: str, cookiefile: Path | None = None
+    ) -> VideoInfo:
         opts = {
             "quiet": True,
             "skip_download": True,
@@ -387,13 +1039,10 @@ class Downloader:
             opts["proxy"] = self.proxy
         if cookiefile and cookiefile.is_file():
             opts["cookiefile"] = str(cookiefile)
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            raw = await to_thread(ydl.extract_info, url, download=False)
-            if not raw:
-                raise ParseException("获取视频信息失败")
-        info = convert(raw, VideoInfo)
-        self.info_cache[url] = info
-        return info
+        raw = await self.ytdlp.run(opts, ydl_extract_info, url)
+        if not raw:
+            raise ParseException("获取视频信息失败")
+        return convert(raw, VideoInfo)
 
     async def _ytdlp_download_video(
         self, url: str, cookiefile: Path | None = None
@@ -403,11 +1052,21 @@ class Downloader:
             raise DurationLimitException
 
         video_path = self.cache_dir / generate_file_name(url, ".mp4")
-        if video_path.exists():
+        if self.media_cache.hit(video_path):
             return video_path
 
+        return await self.download_once(
+            video_path,
+            lambda: self._ytdlp_download_video_to(url, video_path, cookiefile),
+            url,
+        )
+
+    async def _ytdlp_download_video_to(
+        self, url: str, video_path: Path, cookiefile: Path | None
+    ) -> Path:
+        tmp_path = tmp_path_for(video_path)
         opts = {
-            "outtmpl": str(video_path),
+            "outtmpl": str(tmp_path),
             "merge_output_format": "mp4",
             # "format": f"bv[filesize<={info.duration // 10 + 10}M]+ba/b[filesize<={info.duration // 8 + 10}M]",
             "format": "bv*[height<=720]+ba/b[height<=720]",
@@ -422,18 +1081,27 @@ class Downloader:
         if cookiefile and cookiefile.is_file():
             opts["cookiefile"] = str(cookiefile)
 
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            await to_thread(ydl.download, [url])
-        return video_path
+        return await self._ytdlp_download_tmp(url, opts, tmp_path, video_path)
 
     async def _ytdlp_download_audio(self, url: str, cookiefile: Path | None) -> Path:
         file_name = generate_file_name(url)
         audio_path = self.cache_dir / f"{file_name}.flac"
-        if audio_path.exists():
+        if self.media_cache.hit(audio_path):
             return audio_path
 
+        return await self.download_once(
+            audio_path,
+            lambda: self._ytdlp_download_audio_to(url, audio_path, cookiefile),
+            url,
+        )
+
+    async def _ytdlp_download_audio_to(
+        self, url: str, audio_path: Path, cookiefile: Path | None
+    ) -> Path:
+        tmp_path = tmp_path_for(audio_path)
         opts = {
-            "outtmpl": str(self.cache_dir / file_name) + ".%(ext)s",
+            # 抽取音频后 yt-dlp 会替换扩展名，最终产物为 tmp_path
+            "outtmpl": str(tmp_path.with_suffix("")) + ".%(ext)s",
             "format": "bestaudio/best",
             "postprocessors": [
                 {
@@ -450,16 +1118,35 @@ class Downloader:
         if cookiefile and cookiefile.is_file():
             opts["cookiefile"] = str(cookiefile)
 
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            await to_thread(ydl.download, [url])
-        return audio_path
+        return await self._ytdlp_download_tmp(url, opts, tmp_path, audio_path)
+
+    async def _ytdlp_download_tmp(
+        self,
+        url: str,
+        opts: dict[str, Any],
+        tmp_path: Path,
+        path: Path,
+        info: dict[str, Any] | None = None,
+    ) -> Path:
+        """按 opts 下载到 tmp_path, 完成后原子替换为 path, 失败时清理中间文件
+
+        提供已提取的 info 时跳过提取，直接按 opts 选择格式并下载
+        """
+        try:
+            async with self.scheduler.slot(DownloadPriority.HEAVY):
+                await self.ytdlp.run(opts, ydl_download, url, info)
+            if not tmp_path.exists():
+                raise DownloadException("媒体下载失败")
+            return await commit_tmp(tmp_path, path)
+        finally:
+            await discard_tmp(tmp_path)
 
     async def get_ytdlp_formats(self, url: str, cookiefile: Path | None = None) -> list[dict]:
-        """获取视频的所有可用格式"""
-        info = await self.ytdlp_extract_info(url, cookiefile)
-        # 重新提取一次完整信息（ytdlp_extract_info 可能会缓存简略信息或者被其他逻辑复用）
-        # 这里直接用 ytdlp 获取详细 formats
-        
+        """获取视频的所有可用格式
+
+        完整提取一次并缓存 info dict（FORMAT_INFO_TTL 内有效），
+        随后 download_ytdlp_format 直接用它下载，不再重新提取
+        """
         opts = {
             "quiet": True,
             "skip_download": True,
@@ -471,11 +1158,12 @@ class Downloader:
         if cookiefile and cookiefile.is_file():
             opts["cookiefile"] = str(cookiefile)
 
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            raw = await to_thread(ydl.extract_info, url, download=False)
-            if not raw:
-                raise ParseException("获取视频格式失败")
-            
+        # 去掉私有字段后的副本可安全地多次交给 process_ie_result
+        raw = await self.ytdlp.run(opts, ydl_extract_info, url, True)
+        if not raw:
+            raise ParseException("获取视频格式失败")
+        self.format_infos[url] = (time.monotonic() + self.FORMAT_INFO_TTL, raw)
+
         formats = raw.get("formats", [])
         # 过滤并整理格式
         valid_formats = []
@@ -516,11 +1204,28 @@ class Downloader:
         output_dir.mkdir(parents=True, exist_ok=True)
         video_path = output_dir / video_name
         
-        if video_path.exists():
+        if self.media_cache.hit(video_path):
             return video_path
 
+        return await self.download_once(
+            video_path,
+            lambda: self._download_ytdlp_format_to(
+                url, fmt, video_path, cookiefile, download_hook
+            ),
+            url,
+        )
+
+    async def _download_ytdlp_format_to(
+        self,
+        url: str,
+        fmt: str,
+        video_path: Path,
+        cookiefile: Path | None,
+        download_hook: Callable[[dict], None] | None,
+    ) -> Path:
+        tmp_path = tmp_path_for(video_path)
         opts = {
-            "outtmpl": str(video_path),
+            "outtmpl": str(tmp_path),
             "merge_output_format": "mp4",
             "format": fmt,
             "postprocessors": [
@@ -538,11 +1243,14 @@ class Downloader:
         if cookiefile and cookiefile.is_file():
             opts["cookiefile"] = str(cookiefile)
 
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            await to_thread(ydl.download, [url])
-        
-        return video_path
+        info = None
+        if (cached := self.format_infos.get(url)) and cached[0] > time.monotonic():
+            info = cached[1]
+        return await self._ytdlp_download_tmp(url, opts, tmp_path, video_path, info)
 
     async def close(self):
-        """关闭网络客户端"""
+        """关闭网络客户端及共享连接池，保存视频信息缓存"""
         await self.client.close()
+        await self.http.close()
+        await to_thread(self.ytdlp.close)
+        await to_thread(self.info_cache.save)
@@ -44,3 +44,10 @@ class ZeroSizeException(DownloadException):
 
     def __init__(self):
         super().__init__("媒体大小为 0, 取消下载")
+
+
+class OverloadException(ParseException):
+    """解析繁忙，请求被丢弃异常"""
+
+    def __init__(self, message: str | None = None):
+        super().__init__(message or "解析繁忙，已丢弃本次解析")
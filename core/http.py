@@ -0,0 +1,72 @@
+# http.py
+
+from typing import Literal
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+TimeoutProfile = Literal["metadata", "media"]
+
+
+class HttpClientPool:
+    """
+    共享 HTTP 连接池
+    - 下载器与所有解析器共用一个 TCPConnector，同一 CDN 的连接可跨会话复用
+    - 全局连接数与单主机连接数上限，DNS 缓存与 keepalive 可配置
+    - 各方仍持有独立的 ClientSession（独立 Cookie、请求头、代理），仅共享连接
+    - 超时分两类：metadata 用于接口请求，media 用于媒体下载
+    """
+
+    def __init__(self, config: dict):
+        self.limit: int = config.get("http_max_connections", 100)
+        self.limit_per_host: int = config.get("http_max_per_host", 8)
+        self.dns_ttl: int = config.get("http_dns_ttl", 300)
+        self.keepalive: int = config.get("http_keepalive", 30)
+
+        common_timeout = config["common_timeout"]
+        self.timeouts: dict[TimeoutProfile, ClientTimeout] = {
+            "metadata": ClientTimeout(
+                total=common_timeout, sock_connect=min(common_timeout, 10)
+            ),
+            # 媒体下载总时长较长，读超时用于尽早发现卡住的连接，交给续传重试
+            "media": ClientTimeout(
+                total=config["download_timeout"], sock_connect=10, sock_read=60
+            ),
+        }
+        self._connector: TCPConnector | None = None
+
+    @property
+    def connector(self) -> TCPConnector:
+        """共享连接器，惰性创建"""
+        if self._connector is None or self._connector.closed:
+            self._connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=self.dns_ttl > 0,
+                ttl_dns_cache=self.dns_ttl or None,
+                keepalive_timeout=self.keepalive,
+                enable_cleanup_closed=True,
+            )
+        return self._connector
+
+    def session(self, profile: TimeoutProfile = "metadata") -> ClientSession:
+        """创建使用共享连接器的会话，关闭会话不会关闭连接器"""
+        return ClientSession(
+            connector=self.connector,
+            connector_owner=False,
+            timeout=self.timeouts[profile],
+        )
+
+    def stats(self) -> dict[str, int]:
+        connector = self._connector
+        if connector is None or connector.closed:
+            return {"acquired": 0, "idle": 0, "hosts": 0}
+        # 连接器未公开统计接口，这里读取其内部状态，仅用于展示
+        acquired = len(getattr(connector, "_acquired", ()))
+        conns = getattr(connector, "_conns", {})
+        idle = sum(len(v) for v in conns.values())
+        return {"acquired": acquired, "idle": idle, "hosts": len(conns)}
+
+    async def close(self):
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._connector = None
@@ -0,0 +1,134 @@
+# info_cache.py
+
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Generic, TypeVar
+
+import msgspec
+
+from astrbot.api import logger
+
+from .singleflight import SingleFlight
+
+S = TypeVar("S", bound=msgspec.Struct)
+
+
+class _Entry(msgspec.Struct, Generic[S]):
+    key: str
+    expire_at: float
+    info: S
+
+
+class InfoCache(Generic[S]):
+    """
+    媒体信息缓存（yt-dlp 提取结果）
+    - TTL + 条目数上限，超出按 LRU 淘汰
+    - 同一 url 并发未命中时只提取一次，其余等待同一结果
+    - 可选持久化（msgspec），重启后未过期的条目仍可命中
+    - 统计命中、未命中与被合并的并发提取
+    """
+
+    STATE_FILE = "ytdlp_info_cache.json"
+
+    def __init__(self, config: dict, info_type: type[S]):
+        self.ttl: int = config.get("ytdlp_info_cache_ttl", 3600)
+        self.max_entries: int = config.get("ytdlp_info_cache_max_entries", 200)
+        # {key: (过期时间戳, info)}，按最近访问排列；持久化需要墙上时间
+        self._entries: OrderedDict[str, tuple[float, S]] = OrderedDict()
+        self._inflight: SingleFlight[S] = SingleFlight()
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder(list[_Entry[info_type]])
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._state_file: Path | None = None
+        if config.get("ytdlp_info_cache_persist", True) and config.get("data_dir"):
+            self._state_file = Path(config["data_dir"]) / self.STATE_FILE
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> S | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, info: S):
+        if not self.enabled:
+            return
+        self._entries[key] = (time.time() + self.ttl, info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_extract(
+        self, key: str, extract: Callable[[], Awaitable[S]]
+    ) -> S:
+        """命中则直接返回，否则提取并缓存；同一 key 的并发未命中共享一次提取"""
+        if (info := self.get(key)) is not None:
+            return info
+        if key in self._inflight:
+            self.coalesced += 1
+
+        async def run() -> S:
+            info = await extract()
+            self.put(key, info)
+            return info
+
+        return await self._inflight.do(key, run)
+
+    def load(self):
+        """从状态文件恢复未过期的条目"""
+        if not self._state_file or not self._state_file.is_file():
+            return
+        try:
+            entries = self._decoder.decode(self._state_file.read_bytes())
+        except (OSError, msgspec.DecodeError):
+            logger.warning(f"视频信息缓存文件读取失败: {self._state_file}")
+            return
+        now = time.time()
+        for entry in entries:
+            if entry.expire_at >= now:
+                self._entries[entry.key] = (entry.expire_at, entry.info)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logger.debug(f"已恢复 {len(self._entries)} 条视频信息缓存")
+
+    def save(self):
+        """将未过期的条目写入状态文件"""
+        if not self._state_file:
+            return
+        now = time.time()
+        entries = [
+            _Entry(key, expire_at, info)
+            for key, (expire_at, info) in self._entries.items()
+            if expire_at >= now
+        ]
+        try:
+            tmp = self._state_file.with_suffix(".tmp")
+            tmp.write_bytes(self._encoder.encode(entries))
+            tmp.replace(self._state_file)
+        except OSError:
+            logger.warning(f"视频信息缓存文件写入失败: {self._state_file}")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,85 @@
+"""关键词-正则 单趟匹配器"""
+
+import re
+from re import Match, Pattern
+
+
+class KeywordMatcher:
+    """
+    单趟多关键词链接匹配器
+
+    - 所有关键词合并为一个正则，一次扫描得到文本中出现的全部关键词
+    - 仅对出现过的关键词执行其正则，保持“长关键词优先”的判定顺序
+    """
+
+    def __init__(self, key_patterns: list[tuple[str, Pattern[str]]]):
+        # 长关键词优先，与逐个遍历时的优先级保持一致
+        self.key_patterns = sorted(key_patterns, key=lambda x: -len(x[0]))
+        keywords = list(dict.fromkeys(kw for kw, _ in self.key_patterns))
+
+        # 多选一正则，同一位置优先报告最长的关键词
+        self._keyword_re: Pattern[str] | None = (
+            re.compile("|".join(map(re.escape, keywords)))
+            if keywords
+            else None
+        )
+        # 关键词 -> 它所包含的所有关键词（含自身）
+        # 较短关键词作为较长关键词的前缀出现时，只会被报告为较长者，需在此补全
+        self._implied: dict[str, tuple[str, ...]] = {
+            kw: tuple(other for other in keywords if other in kw) for kw in keywords
+        }
+
+    def present_keywords(self, text: str) -> set[str]:
+        """一次扫描，返回文本中出现的全部关键词"""
+        if self._keyword_re is None:
+            return set()
+        present: set[str] = set()
+        search = self._keyword_re.search
+        pos = 0
+        # 命中后从下一个字符继续，不漏掉相互重叠的关键词；无链接消息只扫描一次
+        while m := search(text, pos):
+            present.update(self._implied[m.group(0)])
+            pos = m.start() + 1
+        return present
+
+    def search(self, text: str) -> tuple[str, Match[str]] | None:
+        """返回优先级最高的 (关键词, 匹配结果)，未命中返回 None"""
+        present = self.present_keywords(text)
+        if not present:
+            return None
+        for kw, pat in self.key_patterns:
+            if kw not in present:
+                continue
+            if m := pat.search(text):
+                return kw, m
+        return None
+
+    def find_all(self, text: str) -> list[tuple[str, Match[str]]]:
+        """返回全部互不重叠的 (关键词, 匹配结果)，按出现顺序排列，同一链接只保留一次"""
+        present = self.present_keywords(text)
+        if not present:
+            return []
+
+        # (起始位置, 优先级, 关键词, 匹配结果)，同一位置上长关键词优先
+        candidates: list[tuple[int, int, str, Match[str]]] = []
+        for prio, (kw, pat) in enumerate(self.key_patterns):
+            if kw not in present:
+                continue
+            for m in pat.finditer(text):
+                if m.end() > m.start():
+                    candidates.append((m.start(), prio, kw, m))
+        candidates.sort(key=lambda x: (x[0], x[1]))
+
+        results: list[tuple[str, Match[str]]] = []
+        seen: set[str] = set()
+        end = 0
+        for start, _, kw, m in candidates:
+            if start < end:
+                continue
+            end = m.end()
+            link = m.group(0)
+            if link in seen:
+                continue
+            seen.add(link)
+            results.append((kw, m))
+        return results
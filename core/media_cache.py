@@ -0,0 +1,359 @@
+# media_cache.py
+
+import asyncio
+import os
+import sqlite3
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from astrbot.api import logger
+
+from .utils import TMP_MARK
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    size: int
+    """文件大小"""
+    accessed: float
+    """最近访问时间戳"""
+    platform: str | None = None
+    """来源平台"""
+    url: str | None = None
+    """来源地址"""
+    resource: str | None = None
+    """所属资源（解析结果缓存键）"""
+
+
+class MediaCache:
+    """
+    媒体缓存目录的容量管理与索引
+    - 记录每个文件的大小、最近访问时间、来源地址、平台与所属资源，按 LRU 排列
+    - 总占用超过高水位时淘汰最久未访问的文件，直到低于低水位
+    - 正在发送的文件、未完成的临时文件不会被淘汰
+    - 索引持久化到 SQLite，变更批量落盘；重启后加载索引并与磁盘对账
+    - 管理缓存目录顶层文件（下载产物、渲染卡片均平铺在此）及 SUBDIRS 中的文件
+    """
+
+    HIGH_WATERMARK = 0.9
+    LOW_WATERMARK = 0.7
+    INDEX_FILE = "cache_index.db"
+    SUBDIRS = ("emojis",)
+    """一并管理的子目录（渲染器的 emoji 缓存），其下文件以相对路径为记录名"""
+
+    def __init__(self, config: dict):
+        self.cache_dir = Path(config["cache_dir"])
+        # MB, 0 表示不限制
+        self.max_bytes: int = config.get("cache_max_size", 2048) * 1024 * 1024
+        self.high: float = config.get("cache_high_watermark", self.HIGH_WATERMARK)
+        self.low: float = config.get("cache_low_watermark", self.LOW_WATERMARK)
+        # {文件名: 记录}，按最近访问排列
+        self._files: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._by_url: dict[str, str] = {}
+        self._usage = 0
+        self._in_use: Counter[str] = Counter()
+        # 占用超过高水位时置位，唤醒后台清理
+        self.pressure = asyncio.Event()
+
+        # 索引文件与待落盘的变更
+        self._index_file: Path | None = None
+        if config.get("data_dir"):
+            self._index_file = Path(config["data_dir"]) / self.INDEX_FILE
+        self._dirty: set[str] = set()
+        self._removed: set[str] = set()
+
+        self.hits = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.skipped_in_use = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def usage(self) -> int:
+        return self._usage
+
+    @property
+    def over_high(self) -> bool:
+        return self.enabled and self._usage > self.max_bytes * self.high
+
+    # region -------------------- 读写记录 --------------------
+
+    def _key(self, path: Path) -> str | None:
+        """文件在索引中的记录名（相对缓存目录），不归缓存管理的文件返回 None"""
+        if path.parent == self.cache_dir:
+            return path.name
+        try:
+            rel = path.relative_to(self.cache_dir)
+        except ValueError:
+            return None
+        return rel.as_posix() if rel.parts[0] in self.SUBDIRS else None
+
+    def hit(self, path: Path) -> bool:
+        """文件已缓存则记一次访问并返回 True"""
+        if not path.exists():
+            return False
+        self.hits += 1
+        self.touch(path)
+        return True
+
+    def lookup(self, url: str) -> Path | None:
+        """按来源地址查找已缓存的文件"""
+        name = self._by_url.get(url)
+        if name is None:
+            return None
+        path = self.cache_dir / name
+        if not path.exists():
+            self.discard(path)
+            return None
+        self.hits += 1
+        self.touch(path)
+        return path
+
+    def touch(self, path: Path):
+        """记录一次访问，未登记的文件顺带登记"""
+        name = self._key(path)
+        entry = self._files.get(name) if name else None
+        if entry is None:
+            self.add(path)
+            return
+        entry.accessed = time.time()
+        self._files.move_to_end(name)
+        self._dirty.add(name)
+
+    def add(
+        self,
+        path: Path,
+        *,
+        url: str | None = None,
+        platform: str | None = None,
+        resource: str | None = None,
+    ):
+        """登记新写入（或被覆盖）的文件"""
+        if (name := self._key(path)) is None:
+            return
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return
+        entry = CacheEntry(size, time.time(), platform, url, resource)
+        if (old := self._pop(name)) is not None:
+            # 重复登记时保留已知的来源信息
+            entry.platform = platform or old.platform
+            entry.url = url or old.url
+            entry.resource = resource or old.resource
+        self._put(name, entry)
+        self._dirty.add(name)
+        self._removed.discard(name)
+        if self.over_high:
+            self.pressure.set()
+
+    def discard(self, path: Path):
+        """文件已被删除，移除记录"""
+        if (name := self._key(path)) is None:
+            return
+        if self._pop(name) is not None:
+            self._removed.add(name)
+
+    def _put(self, name: str, entry: CacheEntry):
+        self._files[name] = entry
+        self._usage += entry.size
+        if entry.url:
+            self._by_url[entry.url] = name
+
+    def _pop(self, name: str) -> CacheEntry | None:
+        entry = self._files.pop(name, None)
+        if entry is None:
+            return None
+        self._usage -= entry.size
+        if entry.url and self._by_url.get(entry.url) == name:
+            del self._by_url[entry.url]
+        self._dirty.discard(name)
+        return entry
+
+    @contextmanager
+    def using(self, paths: Iterable[Path]) -> Iterator[None]:
+        """标记文件正在使用（如正在上传），期间不会被淘汰"""
+        names = [name for p in paths if (name := self._key(p))]
+        self._in_use.update(names)
+        try:
+            yield
+        finally:
+            self._in_use.subtract(names)
+            self._in_use += Counter()  # 去掉计数为 0 的项
+
+    # endregion
+
+    def evict_candidates(self) -> list[Path]:
+        """超过高水位时，按 LRU 选出需淘汰的文件（同时从记录中移除）"""
+        if not self.over_high:
+            return []
+        target = self.max_bytes * self.low
+        victims: list[Path] = []
+        for name in list(self._files):
+            if self._usage <= target:
+                break
+            if self._in_use[name]:
+                self.skipped_in_use += 1
+                continue
+            entry = self._files[name]
+            self.discard(self.cache_dir / name)
+            self.evicted_files += 1
+            self.evicted_bytes += entry.size
+            victims.append(self.cache_dir / name)
+        return victims
+
+    # region -------------------- 对账与持久化 --------------------
+
+    async def rescan(self) -> list[Path]:
+        """扫描缓存目录，与索引对账，返回应删除的无效文件
+
+        - 索引中有、磁盘上没有：移除记录
+        - 大小与索引不符：文件被外部改动，视为无效
+        - 磁盘上有、索引中没有：以修改时间作为访问时间登记
+        """
+        scanned = await asyncio.to_thread(self._scan_dir)
+        if scanned is None:
+            return []
+        on_disk = {name: (size, mtime) for name, size, mtime in scanned}
+        invalid: list[Path] = []
+        for name, entry in list(self._files.items()):
+            if name not in on_disk:
+                self.discard(self.cache_dir / name)
+            elif on_disk[name][0] != entry.size:
+                self.discard(self.cache_dir / name)
+                invalid.append(self.cache_dir / name)
+                del on_disk[name]
+
+        found = [
+            (name, CacheEntry(size, mtime))
+            for name, (size, mtime) in on_disk.items()
+            if name not in self._files
+        ]
+        if found:
+            entries = [*self._files.items(), *found]
+            entries.sort(key=lambda item: item[1].accessed)
+            self._files.clear()
+            self._by_url.clear()
+            self._usage = 0
+            for name, entry in entries:
+                self._put(name, entry)
+            self._dirty.update(name for name, _ in found)
+        if self.over_high:
+            self.pressure.set()
+        return invalid
+
+    def _scan_dir(self) -> list[tuple[str, int, float]] | None:
+        """列出缓存目录顶层及 SUBDIRS 下的完整文件：(记录名, 大小, 修改时间)"""
+        files: list[tuple[str, int, float]] = []
+        pending = [("", self.cache_dir)]
+        while pending:
+            prefix, directory = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            # 顶层只进入 SUBDIRS，其下逐层展开
+                            if prefix or entry.name in self.SUBDIRS:
+                                pending.append((f"{prefix}{entry.name}/", entry.path))
+                            continue
+                        if TMP_MARK in entry.name or not entry.is_file():
+                            continue
+                        st = entry.stat()
+                        files.append((prefix + entry.name, st.st_size, st.st_mtime))
+            except FileNotFoundError:
+                continue
+            except OSError:
+                logger.exception(f"扫描缓存目录失败: {directory}")
+                return None
+        return files
+
+    async def load(self):
+        """从索引文件恢复记录，需随后调用 rescan 与磁盘对账"""
+        if not self._index_file:
+            return
+        try:
+            rows = await asyncio.to_thread(self._read_index)
+        except sqlite3.Error:
+            logger.exception(f"缓存索引读取失败: {self._index_file}")
+            return
+        self._files.clear()
+        self._by_url.clear()
+        self._usage = 0
+        for name, size, accessed, platform, url, resource in rows:
+            self._put(name, CacheEntry(size, accessed, platform, url, resource))
+        logger.debug(f"已加载 {len(self._files)} 条缓存索引")
+
+    async def save(self):
+        """将累积的变更写入索引文件"""
+        if not self._index_file or not (self._dirty or self._removed):
+            return
+        upserts = [
+            (name, e.size, e.accessed, e.platform, e.url, e.resource)
+            for name in self._dirty
+            if (e := self._files.get(name)) is not None
+        ]
+        removed = [(name,) for name in self._removed]
+        self._dirty.clear()
+        self._removed.clear()
+        try:
+            await asyncio.to_thread(self._write_index, upserts, removed)
+        except sqlite3.Error:
+            logger.exception(f"缓存索引写入失败: {self._index_file}")
+
+    def _connect(self) -> sqlite3.Connection:
+        assert self._index_file is not None
+        conn = sqlite3.connect(self._index_file)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS media ("
+            "name TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed REAL NOT NULL, "
+            "platform TEXT, url TEXT, resource TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS media_url ON media (url)")
+        conn.execute("CREATE INDEX IF NOT EXISTS media_resource ON media (resource)")
+        return conn
+
+    def _read_index(self) -> list[tuple]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT name, size, accessed, platform, url, resource "
+                "FROM media ORDER BY accessed"
+            ).fetchall()
+
+    def _write_index(self, upserts: list[tuple], removed: list[tuple]):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM media WHERE name = ?", removed)
+            conn.executemany(
+                "INSERT OR REPLACE INTO media "
+                "(name, size, accessed, platform, url, resource) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                upserts,
+            )
+
+    # endregion
+
+    def platform_stats(self) -> dict[str, tuple[int, int]]:
+        """各平台的 (文件数, 占用字节)"""
+        stats: dict[str, tuple[int, int]] = {}
+        for entry in self._files.values():
+            count, size = stats.get(entry.platform or "unknown", (0, 0))
+            stats[entry.platform or "unknown"] = (count + 1, size + entry.size)
+        return stats
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._files),
+            "usage": self._usage,
+            "max": self.max_bytes,
+            "in_use": len(self._in_use),
+            "hits": self.hits,
+            "evicted_files": self.evicted_files,
+            "evicted_bytes": self.evicted_bytes,
+            "skipped_in_use": self.skipped_in_use,
+        }
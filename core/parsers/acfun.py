@@ -1,4 +1,3 @@
-import asyncio
 import json
 import re
 import time
@@ -11,9 +10,10 @@ from aiohttp import ClientError
 from astrbot.api import logger
 from astrbot.core.config.astrbot_config import AstrBotConfig
 
-from ..download import Downloader
+from ..download import Downloader, auto_task
 from ..exception import DownloadException, ParseException
-from ..utils import safe_unlink
+from ..scheduler import DownloadPriority
+from ..utils import commit_tmp, safe_unlink, tmp_path_for
 from .base import BaseParser, Platform, handle
 
 
@@ -43,7 +43,7 @@ class AcfunParser(BaseParser):
         text = f"简介: {description}"
 
         # 下载视频
-        video_task = asyncio.create_task(self.download_video(m3u8_url, acid))
+        video_task = self.download_video(m3u8_url, acid)
 
         return self.result(
             title=title,
@@ -91,6 +91,7 @@ class AcfunParser(BaseParser):
 
         return m3u8_url, title, description, author, upload_time
 
+    @auto_task
     async def download_video(self, m3u8s_url: str, acid: int) -> Path:
         """下载acfun视频
 
@@ -104,13 +105,18 @@ class AcfunParser(BaseParser):
 
         m3u8_full_urls = await self._parse_m3u8(m3u8s_url)
         video_file = self.cache_dir / f"acfun_{acid}.mp4"
-        if video_file.exists():
+        if self.downloader.media_cache.hit(video_file):
             return video_file
 
         max_size = self.max_size * 1024 * 1024
+        tmp_file = tmp_path_for(video_file)
 
+        scheduler = self.downloader.scheduler
         try:
-            async with aiofiles.open(video_file, "wb") as f:
+            async with (
+                scheduler.slot(DownloadPriority.HEAVY),
+                aiofiles.open(tmp_file, "wb") as f,
+            ):
                 with self.downloader.get_progress_bar(video_file.name) as bar:
                     total = 0
                     for url in m3u8_full_urls:
@@ -118,6 +124,7 @@ class AcfunParser(BaseParser):
                             if resp.status >= 400:
                                 raise ClientError(f"{resp.status} {resp.reason}")
                             async for chunk in resp.content.iter_chunked(1024 * 1024):
+                                await scheduler.throttle(len(chunk), DownloadPriority.HEAVY)
                                 await f.write(chunk)
                                 total += len(chunk)
                                 bar.update(len(chunk))
@@ -127,9 +134,16 @@ class AcfunParser(BaseParser):
                             break
 
         except ClientError:
-            await safe_unlink(video_file)
+            await safe_unlink(tmp_file)
             logger.exception("视频下载失败")
             raise DownloadException("视频下载失败")
+        except BaseException:
+            await safe_unlink(tmp_file)
+            raise
+        await commit_tmp(tmp_file, video_file)
+        self.downloader.media_cache.add(
+            video_file, url=m3u8s_url, platform=self.platform.name
+        )
         return video_file
 
     async def _parse_m3u8(self, m3u8_url: str):
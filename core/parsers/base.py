@@ -7,7 +7,7 @@ from pathlib import Path
 from re import Match, Pattern, compile
 from typing import TYPE_CHECKING, Any, ClassVar, TypeVar, cast
 
-from aiohttp import ClientError, ClientSession, ClientTimeout
+from aiohttp import ClientError, ClientSession
 from typing_extensions import Unpack
 
 from astrbot.core.config.astrbot_config import AstrBotConfig
@@ -27,6 +27,7 @@ from ..data import (
 )
 from ..download import Downloader
 from ..exception import ParseException
+from ..utils import normalize_link
 
 T = TypeVar("T", bound="BaseParser")
 HandlerFunc = Callable[[T, Match[str]], Coroutine[Any, Any, ParseResult]]
@@ -64,6 +65,10 @@ class BaseParser:
     platform: ClassVar[Platform]
     """ 平台信息（包含名称和显示名称） """
 
+    cache_ttl: ClassVar[int] = 3600
+    """ 解析结果缓存秒数，0 表示不缓存；媒体地址带签名、过期快的平台应覆盖调小，
+    实际取值不超过 parse_cache_ttl """
+
     if TYPE_CHECKING:
         _key_patterns: ClassVar[KeyPatterns]
         _handlers: ClassVar[dict[str, HandlerFunc]]
@@ -85,9 +90,8 @@ class BaseParser:
             self.proxy = config.get("proxy") or None
         else:
             self.proxy = None
-        # 每个实例拥有独立的 session
+        # 每个实例拥有独立的 session（独立 Cookie），连接由下载器的连接池共享
         self._session: ClientSession | None = None
-        self._timeout = config["common_timeout"]
 
     def __init_subclass__(cls, **kwargs):
         """自动注册子类到 _registry"""
@@ -120,7 +124,7 @@ class BaseParser:
     def client(self) -> ClientSession:
         """获取当前实例的 session，惰性创建"""
         if self._session is None or self._session.closed:
-            self._session = ClientSession(timeout=ClientTimeout(total=self._timeout))
+            self._session = self.downloader.http.session("metadata")
         return self._session
 
     async def close_session(self) -> None:
@@ -144,6 +148,41 @@ class BaseParser:
         """
         return await self._handlers[keyword](self, searched)
 
+    def media_key(self, url: str) -> str | None:
+        """媒体 url 的规范键，决定缓存文件名
+
+        平台 CDN 的 url 常带轮换的签名、过期时间或节点域名，同一媒体每次解析得到的
+        url 都不同。子类可重写，从 url 中提取稳定部分（如视频 ID + 清晰度、图片指纹），
+        返回 None 表示按完整 url 命名
+
+        Args:
+            url: 媒体 url
+
+        Returns:
+            str | None: 规范键
+        """
+        return None
+
+    def get_cache_key(self, keyword: str, searched: Match[str]) -> str | None:
+        """解析结果的缓存键（平台内规范资源 ID）
+
+        默认取处理器名 + 正则命名分组（如 bvid、vid），无命名分组时取规范化链接。
+        子类可重写，返回 None 表示该链接不缓存
+
+        Args:
+            keyword: 关键词
+            searched: 正则表达式匹配对象
+
+        Returns:
+            str | None: 缓存键
+        """
+        groups = {k: v for k, v in searched.groupdict().items() if v is not None}
+        if groups:
+            ident = "&".join(f"{k}={v}" for k, v in sorted(groups.items()))
+        else:
+            ident = normalize_link(searched.group(0))
+        return f"{self._handlers[keyword].__name__}:{ident}"
+
     async def parse_with_redirect(
         self,
         url: str,
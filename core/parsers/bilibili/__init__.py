@@ -4,6 +4,7 @@ from collections.abc import AsyncGenerator
 from pathlib import Path
 from re import Match
 from typing import ClassVar
+from urllib.parse import urlparse
 
 from bilibili_api import HEADERS, Credential, request_settings, select_client
 from bilibili_api.login_v2 import QrCodeLogin, QrCodeLoginEvents
@@ -15,7 +16,9 @@ from astrbot.api import logger
 from astrbot.core.config.astrbot_config import AstrBotConfig
 
 from ...data import ImageContent, MediaContent, Platform
+from ...download import auto_task
 from ...exception import DownloadException, DurationLimitException
+from ...scheduler import DownloadPriority
 from ...utils import ck2dict
 from ..base import (
     BaseParser,
@@ -34,6 +37,8 @@ request_settings.set("impersonate", "chrome131")
 class BilibiliParser(BaseParser):
     # 平台信息
     platform: ClassVar[Platform] = Platform(name="bilibili", display_name="B站")
+    # 取流地址带 deadline 签名，约两小时失效
+    cache_ttl: ClassVar[int] = 1800
 
     def __init__(self, config: AstrBotConfig, downloader: Downloader):
         super().__init__(config, downloader)
@@ -51,6 +56,21 @@ class BilibiliParser(BaseParser):
         self.bili_ck = config["bili_ck"]
         self._cookies_file = Path(config["data_dir"]) / "bilibili_cookies.json"
 
+    def media_key(self, url: str) -> str | None:
+        # 视频流路径含 cid 与清晰度编码，查询串为签名与过期时间，各 CDN 节点路径一致
+        parsed = urlparse(url)
+        if "/upgcxcode/" in parsed.path:
+            return f"stream:{parsed.path[parsed.path.index('/upgcxcode/') :]}"
+        if (parsed.hostname or "").endswith("hdslb.com"):
+            return f"img:{parsed.path}"
+        return None
+
+    def get_cache_key(self, keyword: str, searched: Match[str]) -> str | None:
+        # 直播状态实时变化，不缓存
+        if keyword == "live.bili":
+            return None
+        return super().get_cache_key(keyword, searched)
+
     @handle("b23.tv", r"b23\.tv/[A-Za-z\d\._?%&+\-=/#]+")
     @handle("bili2233", r"bili2233\.cn/[A-Za-z\d\._?%&+\-=/#]+")
     async def _parse_short_link(self, searched: Match[str]):
@@ -161,10 +181,11 @@ class BilibiliParser(BaseParser):
         url = f"https://bilibili.com/{video_info.bvid}"
         url += f"?p={page_info.index + 1}" if page_info.index > 0 else ""
 
-        # 视频下载 task
+        # 视频下载 task（含取流地址的 API 请求，同样受下载闸门约束）
+        @auto_task
         async def download_video():
             output_path = self.cache_dir / f"{video_info.bvid}-{page_num}.mp4"
-            if output_path.exists():
+            if self.downloader.media_cache.hit(output_path):
                 return output_path
             v_url, a_url = await self.extract_download_urls(video=video, page_index=page_info.index)
             if page_info.duration > self.max_duration:
@@ -175,10 +196,14 @@ class BilibiliParser(BaseParser):
                 )
             else:
                 return await self.downloader.streamd(
-                    v_url, file_name=output_path.name, ext_headers=self.headers, proxy=self.proxy
+                    v_url,
+                    file_name=output_path.name,
+                    ext_headers=self.headers,
+                    proxy=self.proxy,
+                    priority=DownloadPriority.HEAVY,
                 )
 
-        video_task = asyncio.create_task(download_video())
+        video_task = download_video()
         video_content = self.create_video_content(
             video_task,
             page_info.cover,
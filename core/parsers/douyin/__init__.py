@@ -2,6 +2,7 @@ import json
 import re
 from pathlib import Path
 from typing import TYPE_CHECKING, ClassVar
+from urllib.parse import parse_qs, urlparse
 
 import msgspec
 
@@ -23,6 +24,8 @@ if TYPE_CHECKING:
 class DouyinParser(BaseParser):
     # 平台信息
     platform: ClassVar[Platform] = Platform(name="douyin", display_name="抖音")
+    # 播放与图片地址带签名，过期较快
+    cache_ttl: ClassVar[int] = 600
 
     def __init__(self, config: AstrBotConfig, downloader: Downloader):
         super().__init__(config, downloader)
@@ -32,6 +35,22 @@ class DouyinParser(BaseParser):
         if self.douyin_ck:
             self._set_cookies(self.douyin_ck)
 
+    def media_key(self, url: str) -> str | None:
+        # 播放接口：url_list 中各线路仅域名、line 不同，按 video_id + 清晰度归一
+        # 图片 / 直链：签名与过期时间在查询串或路径前段，节点编号（p3/p6/p9）轮换
+        parsed = urlparse(url)
+        host = parsed.hostname or ""
+        if video_id := parse_qs(parsed.query).get("video_id"):
+            ratio = parse_qs(parsed.query).get("ratio", ["default"])[0]
+            return f"video:{video_id[0]}:{ratio}"
+        if host.endswith("douyinpic.com"):
+            return f"img:{parsed.path}"
+        if host.endswith("douyinvod.com"):
+            # /{签名}/{过期时间}/video/tos/... ，去掉前两段
+            parts = parsed.path.strip("/").split("/")
+            return f"vod:{'/'.join(parts[2:])}" if len(parts) > 2 else None
+        return None
+
     def _clean_cookie(self, cookie: str) -> str:
         """清理cookie中的换行符和回车符"""
         return cookie.replace("\n", "").replace("\r", "").strip()
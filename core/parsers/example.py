@@ -99,6 +99,11 @@ video = self.create_video_content(
     duration=duration
 )
 
+## 自定义下载方法请用 @auto_task 装饰（from ..download import auto_task），
+## 不要直接 asyncio.create_task：推测解析的下载闸门只约束 auto_task 创建的任务
+@auto_task
+async def download_video(self, url: str) -> Path: ...
+
 
 # 并发下载图集内容
 images = self.create_image_contents([
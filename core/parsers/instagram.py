@@ -8,15 +8,21 @@ from pathlib import Path
 from typing import Any, ClassVar
 from urllib.parse import urlparse
 
-import yt_dlp
-
 from astrbot.api import logger
 from astrbot.core.config.astrbot_config import AstrBotConfig
 
 from ..data import ImageContent, Platform, VideoContent
 from ..download import Downloader
 from ..exception import DownloadException, ParseException
-from ..utils import generate_file_name, safe_unlink, save_cookies_with_netscape
+from ..scheduler import DownloadPriority
+from ..utils import (
+    commit_tmp,
+    discard_tmp,
+    generate_file_name,
+    save_cookies_with_netscape,
+    tmp_path_for,
+)
+from ..ytdlp_pool import ydl_download, ydl_extract_info
 from .base import BaseParser, handle
 
 
@@ -200,8 +206,7 @@ class InstagramParser(BaseParser):
             opts["cookiefile"] = str(self.ig_cookies_file)
         for attempt in range(1, max_attempts + 1):
             try:
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    raw = await asyncio.to_thread(ydl.extract_info, url, download=False)
+                raw = await self.downloader.ytdlp.run(opts, ydl_extract_info, url)
                 if isinstance(raw, dict):
                     return raw
                 return None
@@ -225,12 +230,19 @@ class InstagramParser(BaseParser):
             output_path = self.downloader.cache_dir / output_name
         else:
             output_path = self.downloader.cache_dir / generate_file_name(url, ".mp4")
-        if output_path.exists():
+        if self.downloader.media_cache.hit(output_path):
             return output_path
+        # 同一目标文件的并发请求共享一次下载
+        return await self.downloader.download_once(
+            output_path, lambda: self._ytdlp_download_to(url, output_path), url
+        )
+
+    async def _ytdlp_download_to(self, url: str, output_path: Path) -> Path:
         retries = 2
+        tmp_path = tmp_path_for(output_path)
         opts: dict[str, Any] = {
             "quiet": True,
-            "outtmpl": str(output_path),
+            "outtmpl": str(tmp_path),
             "merge_output_format": "mp4",
             "format": "best[height<=720]/bestvideo[height<=720]+bestaudio/best",
             "http_headers": {**self.headers, "Referer": "https://www.instagram.com/"},
@@ -241,11 +253,13 @@ class InstagramParser(BaseParser):
             opts["cookiefile"] = str(self.ig_cookies_file)
         for attempt in range(retries + 1):
             try:
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    await asyncio.to_thread(ydl.download, [url])
-                return output_path
+                async with self.downloader.scheduler.slot(DownloadPriority.HEAVY):
+                    await self.downloader.ytdlp.run(opts, ydl_download, url)
+                if not tmp_path.exists():
+                    raise DownloadException("媒体下载失败")
+                return await commit_tmp(tmp_path, output_path)
             except Exception as exc:
-                await safe_unlink(output_path)
+                await discard_tmp(tmp_path)
                 if attempt < retries:
                     await asyncio.sleep(1 + attempt)
                     continue
@@ -499,7 +513,7 @@ class InstagramParser(BaseParser):
                 cover_task = None
                 if audio_url:
                     output_path = self._merged_output_path(video_url, audio_url)
-                    if output_path.exists():
+                    if self.downloader.media_cache.hit(output_path):
                         video_task = output_path
                     else:
                         video_task = self.downloader.download_av_and_merge(
@@ -516,7 +530,7 @@ class InstagramParser(BaseParser):
                         v_url, a_url = self._select_media_urls(info)
                     if a_url and v_url:
                         output_path = self._merged_output_path(v_url, a_url)
-                        if output_path.exists():
+                        if self.downloader.media_cache.hit(output_path):
                             video_task = output_path
                         else:
                             video_task = self.downloader.download_av_and_merge(
@@ -17,6 +17,8 @@ class KuaiShouParser(BaseParser):
 
     # 平台信息
     platform: ClassVar[Platform] = Platform(name="kuaishou", display_name="快手")
+    # CDN 地址带签名与过期时间
+    cache_ttl: ClassVar[int] = 600
 
     def __init__(self, config: AstrBotConfig, downloader: Downloader):
         super().__init__(config, downloader)
@@ -1,6 +1,7 @@
 from re import Match, sub
 from time import time
 from typing import ClassVar
+from urllib.parse import parse_qs, urlparse
 from uuid import uuid4
 
 import msgspec
@@ -30,6 +31,18 @@ class WeiBoParser(BaseParser):
         }
         self.headers.update(extra_headers)
 
+    def media_key(self, url: str) -> str | None:
+        # 图片在 wx1~wx4 等镜像间轮换，路径（尺寸 + 图片 ID）唯一；
+        # 视频查询串含签名与过期时间，清晰度由 label 区分
+        parsed = urlparse(url)
+        host = parsed.hostname or ""
+        if host.endswith("sinaimg.cn"):
+            return f"img:{parsed.path}"
+        if host.endswith("weibocdn.com"):
+            label = parse_qs(parsed.query).get("label", [""])[0]
+            return f"video:{parsed.path}:{label}"
+        return None
+
     # https://weibo.com/tv/show/1034:5007449447661594?mid=5007452630158934
     @handle("weibo.com/tv", r"weibo\.com/tv/show/\d{4}:\d+\?mid=(?P<mid>\d+)")
     async def _parse_weibo_tv(self, searched: Match[str]):
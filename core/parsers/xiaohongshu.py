@@ -1,6 +1,7 @@
 import json
 import re
 from typing import Any, ClassVar
+from urllib.parse import urlparse
 
 from msgspec import Struct, convert, field
 
@@ -14,6 +15,8 @@ from .base import BaseParser, ParseException, Platform, handle
 class XiaoHongShuParser(BaseParser):
     # 平台信息
     platform: ClassVar[Platform] = Platform(name="xiaohongshu", display_name="小红书")
+    # 图片、视频地址带签名与时间戳
+    cache_ttl: ClassVar[int] = 600
 
     def __init__(self, config: AstrBotConfig, downloader: Downloader):
         super().__init__(config, downloader)
@@ -33,6 +36,15 @@ class XiaoHongShuParser(BaseParser):
         }
         self.ios_headers.update(discovery_headers)
 
+    def media_key(self, url: str) -> str | None:
+        # 图片路径前段为时间戳与签名，末段为 图片 ID!样式；视频路径即流 ID
+        parsed = urlparse(url)
+        if not (parsed.hostname or "").endswith("xhscdn.com"):
+            return None
+        if parsed.hostname.startswith("sns-webpic"):
+            return f"img:{parsed.path.rsplit('/', 1)[-1]}"
+        return f"video:{parsed.path}"
+
     @handle("xhslink.com", r"xhslink\.com/[A-Za-z0-9._?%&+=/#@-]*")
     async def _parse_short_link(self, searched: re.Match[str]):
         url = f"https://{searched.group(0)}"
@@ -0,0 +1,106 @@
+# result_cache.py
+
+import time
+from asyncio import Task
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+
+from .data import ParseResult, VideoContent
+from .exception import DownloadLimitException
+
+
+class ParseResultCache:
+    """
+    解析结果缓存
+    - key: (平台, 平台内规范资源 ID)
+    - TTL 按平台设置，受全局上限约束
+    - 条目数上限，超出按 LRU 淘汰
+    - 命中时校验媒体文件仍在磁盘上，否则视为失效
+    """
+
+    def __init__(self, config: dict):
+        self.ttl: int = config.get("parse_cache_ttl", 3600)
+        self.max_entries: int = config.get("parse_cache_max_entries", 200)
+        # {(platform, key): (expire_at, result)}
+        self._entries: OrderedDict[tuple[str, str], tuple[float, ParseResult]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, platform: str, key: str) -> ParseResult | None:
+        entry = self._entries.get((platform, key))
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expire_at, result = entry
+        if expire_at < time.monotonic() or not self._media_alive(result):
+            self.invalidate(platform, key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end((platform, key))
+        self.hits += 1
+        return result
+
+    def put(self, platform: str, key: str, result: ParseResult, ttl: int):
+        ttl = min(ttl, self.ttl)
+        if not self.enabled or ttl <= 0:
+            return
+        self._entries[(platform, key)] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end((platform, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, platform: str, key: str):
+        if self._entries.pop((platform, key), None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    @classmethod
+    def _media_alive(cls, result: ParseResult) -> bool:
+        """媒体仍可复用：下载中，或已下载且文件仍在；超限类失败结果稳定，同样可复用"""
+        for media in cls._iter_media(result):
+            if isinstance(media, Path):
+                if not media.exists():
+                    return False
+                continue
+            if not media.done():
+                continue
+            if media.cancelled():
+                return False
+            if (exc := media.exception()) is not None:
+                if isinstance(exc, DownloadLimitException):
+                    continue
+                return False
+            if not media.result().exists():
+                return False
+        return True
+
+    @classmethod
+    def _iter_media(cls, result: ParseResult) -> Iterator[Path | Task[Path]]:
+        if result.author and result.author.avatar is not None:
+            yield result.author.avatar
+        for cont in result.contents:
+            yield cont.path_task
+            if isinstance(cont, VideoContent) and cont.cover is not None:
+                yield cont.cover
+        if result.repost:
+            yield from cls._iter_media(result.repost)
@@ -0,0 +1,402 @@
+# scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+from astrbot.api import logger
+
+from .exception import OverloadException
+from .utils import exec_ffmpeg_cmd
+
+
+class ParseScheduler:
+    """
+    解析准入控制
+    - 每个平台独立的并发上限 + 全局并发上限
+    - 等待队列有长度上限，超出直接丢弃
+    - 排队超过最长等待时间同样丢弃
+    - 统计队列深度与等待耗时
+    """
+
+    def __init__(self, config: dict):
+        self.max_concurrency: int = config.get("parse_max_concurrency", 8)
+        self.platform_concurrency: int = config.get("parse_platform_concurrency", 3)
+        self.max_queue: int = config.get("parse_max_queue", 50)
+        self.max_wait: float = config.get("parse_max_wait", 30)
+
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._platforms: dict[str, asyncio.Semaphore] = {}
+        self._running: dict[str, int] = {}
+
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _platform_sem(self, platform: str) -> asyncio.Semaphore:
+        if (sem := self._platforms.get(platform)) is None:
+            sem = self._platforms[platform] = asyncio.Semaphore(
+                self.platform_concurrency
+            )
+        return sem
+
+    async def _acquire(self, platform_sem: asyncio.Semaphore):
+        await platform_sem.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            platform_sem.release()
+            raise
+
+    @asynccontextmanager
+    async def slot(self, platform: str) -> AsyncIterator[None]:
+        """获取一个解析名额，拿不到则抛出 OverloadException"""
+        platform_sem = self._platform_sem(platform)
+        busy = platform_sem.locked() or self._global.locked()
+        if busy and self.waiting >= self.max_queue:
+            self.shed += 1
+            logger.warning(
+                f"[解析限流] 队列已满({self.waiting}/{self.max_queue})，丢弃 {platform} 解析"
+            )
+            raise OverloadException
+
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._acquire(platform_sem), self.max_wait)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            logger.warning(
+                f"[解析限流] {platform} 排队超过 {self.max_wait} 秒，丢弃本次解析"
+            )
+            raise OverloadException from None
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._running[platform] = self._running.get(platform, 0) + 1
+        try:
+            yield
+        finally:
+            self._running[platform] -= 1
+            self._global.release()
+            platform_sem.release()
+
+    def stats(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "running": {k: v for k, v in self._running.items() if v},
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "avg_wait": round(self._wait_total / self.admitted, 3)
+            if self.admitted
+            else 0.0,
+            "max_wait": round(self._wait_max, 3),
+        }
+
+
+class DownloadPriority(IntEnum):
+    """下载优先级，数值越小越优先"""
+
+    IMAGE = 0
+    """渲染卡片所需的图片（头像、封面、配图）"""
+    LIGHT = 1
+    """小体积媒体（音频、小文件、短视频）"""
+    HEAVY = 2
+    """大体积媒体（长视频、音视频合并、yt-dlp 下载）"""
+
+
+class _PrioritySlots:
+    """按优先级唤醒等待者的计数信号量"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._seq = itertools.count()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    async def acquire(self, priority: int):
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # 名额已转交但等待者被取消，转交给下一个
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self._waiters and self.active < self.limit:
+            *_, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                self.active += 1
+                fut.set_result(None)
+
+
+class DownloadScheduler:
+    """
+    媒体下载调度
+    - 下载名额按优先级分配：渲染所需图片 > 轻量媒体 > 重量媒体
+    - 重量媒体另有并发上限，始终给图片和轻量媒体留出名额
+    - 可选全局带宽上限（令牌桶），高优先级下载在等待令牌时，低优先级暂停消耗
+    """
+
+    HEAVY_SIZE = 8 * 1024 * 1024
+    """声明大小达到此值的下载按重量媒体限速"""
+    _TICK = 0.05
+
+    def __init__(self, config: dict):
+        self.max_concurrency: int = config.get("download_max_concurrency", 8)
+        self.heavy_concurrency: int = config.get("download_heavy_concurrency", 2)
+        # MB/s, 0 表示不限速
+        self.rate: float = config.get("download_bandwidth_limit", 0) * 1024 * 1024
+
+        self._slots = _PrioritySlots(self.max_concurrency)
+        self._heavy = asyncio.Semaphore(self.heavy_concurrency)
+        self._running = dict.fromkeys(DownloadPriority, 0)
+        self._throttling = dict.fromkeys(DownloadPriority, 0)
+        # 令牌桶，允许透支一次读取的量
+        self._tokens = self.rate
+        self._refill_at = time.monotonic()
+        self.throttled = 0.0
+
+    @asynccontextmanager
+    async def slot(self, priority: DownloadPriority) -> AsyncIterator[None]:
+        """获取一个下载名额"""
+        heavy = priority is DownloadPriority.HEAVY
+        if heavy:
+            await self._heavy.acquire()
+        try:
+            await self._slots.acquire(priority)
+            self._running[priority] += 1
+            try:
+                yield
+            finally:
+                self._running[priority] -= 1
+                self._slots.release()
+        finally:
+            if heavy:
+                self._heavy.release()
+
+    async def throttle(self, nbytes: int, priority: DownloadPriority):
+        """消耗 nbytes 的带宽令牌，未限速时直接返回"""
+        if self.rate <= 0:
+            return
+        start = time.monotonic()
+        self._throttling[priority] += 1
+        try:
+            while True:
+                if any(self._throttling[p] for p in DownloadPriority if p < priority):
+                    # 有更高优先级的下载在等令牌，让出
+                    delay = self._TICK
+                else:
+                    self._refill()
+                    if self._tokens > 0:
+                        self._tokens -= nbytes
+                        break
+                    delay = -self._tokens / self.rate
+                await asyncio.sleep(delay)
+        finally:
+            self._throttling[priority] -= 1
+            self.throttled += time.monotonic() - start
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._refill_at) * self.rate, self.rate)
+        self._refill_at = now
+
+    def stats(self) -> dict:
+        return {
+            "running": {p.name: n for p, n in self._running.items() if n},
+            "waiting": self._slots.waiting,
+            "limit": round(self.rate / 1024 / 1024, 2),
+            "throttled": round(self.throttled, 1),
+        }
+
+
+class FFmpegPriority(IntEnum):
+    """ffmpeg 任务优先级，数值越小越优先"""
+
+    REMUX = 0
+    """流复制（-c copy）合并 / 封装，耗时短"""
+    ENCODE = 1
+    """重新编码（libx264 等），占满 CPU 且耗时长"""
+
+
+class FFmpegPool:
+    """
+    ffmpeg 任务执行器
+    - 同时运行的 ffmpeg 进程数有上限（默认 CPU 核数），其余排队
+    - 按优先级出队：流复制先于重新编码，短任务不被长编码堵住
+    - 单个任务超时即结束进程
+    - 边下载边处理的任务（从管道读取网络输入）不占名额，超时只计输入写完之后
+    - 统计排队深度、排队耗时与各类任务耗时；边下载边处理的任务单独计为 STREAM
+    """
+
+    def __init__(self, config: dict):
+        # 0 表示按 CPU 核数
+        self.workers: int = config.get("ffmpeg_workers", 0) or os.cpu_count() or 2
+        # 秒, 0 表示不限制
+        self.timeout: float = config.get("ffmpeg_timeout", 600)
+
+        self._slots = _PrioritySlots(self.workers)
+        self._running = dict.fromkeys(FFmpegPriority, 0)
+        self._jobs = dict.fromkeys(FFmpegPriority, 0)
+        self._duration = dict.fromkeys(FFmpegPriority, 0.0)
+        self._duration_max = dict.fromkeys(FFmpegPriority, 0.0)
+        self._wait_total = 0.0
+        self._streaming = 0
+        self.streamed = 0
+        self._stream_duration = 0.0
+        self._stream_duration_max = 0.0
+        self._stream_tail = 0.0
+        self.failed = 0
+        self.timed_out = 0
+
+    @staticmethod
+    def classify(cmd: list[str]) -> FFmpegPriority:
+        """按命令判断任务类型：只做流复制的视为 REMUX"""
+        for flag, value in zip(cmd, cmd[1:]):
+            if flag in ("-c", "-c:v", "-vcodec") and value != "copy":
+                return FFmpegPriority.ENCODE
+        return FFmpegPriority.REMUX if "copy" in cmd else FFmpegPriority.ENCODE
+
+    async def run(
+        self,
+        cmd: list[str],
+        *,
+        priority: FFmpegPriority | None = None,
+        pass_fds: tuple[int, ...] = (),
+        started: asyncio.Event | None = None,
+        input_done: asyncio.Event | None = None,
+    ) -> str:
+        """排队执行一条 ffmpeg 命令，返回标准错误输出
+
+        Args:
+            cmd (list[str]): 命令序列
+            priority (FFmpegPriority | None): 优先级，默认按命令判断
+            pass_fds (tuple[int, ...]): 传给子进程的文件描述符
+            started (asyncio.Event | None): 出队、进程启动后置位
+            input_done (asyncio.Event | None): 传入表示边下载边处理，
+                输入全部写入管道后置位；进程不占名额，超时从置位时开始计算
+
+        Raises:
+            RuntimeError: ffmpeg 执行失败或超时
+        """
+        if input_done is not None:
+            return await self._run_streaming(cmd, pass_fds, started, input_done)
+        if priority is None:
+            priority = self.classify(cmd)
+        queued_at = time.monotonic()
+        await self._slots.acquire(priority)
+        start = time.monotonic()
+        self._wait_total += start - queued_at
+        self._running[priority] += 1
+        try:
+            return await asyncio.wait_for(
+                exec_ffmpeg_cmd(cmd, pass_fds, started), self.timeout or None
+            )
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.warning(f"ffmpeg 执行超时 ({self.timeout}s), 已结束进程")
+            raise RuntimeError(f"ffmpeg 执行超时 ({self.timeout}s)")
+        except RuntimeError:
+            self.failed += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            self._running[priority] -= 1
+            self._jobs[priority] += 1
+            self._duration[priority] += elapsed
+            self._duration_max[priority] = max(self._duration_max[priority], elapsed)
+            self._slots.release()
+
+    async def _run_streaming(
+        self,
+        cmd: list[str],
+        pass_fds: tuple[int, ...],
+        started: asyncio.Event | None,
+        input_done: asyncio.Event,
+    ) -> str:
+        """边下载边处理：下载期间 ffmpeg 只在等待管道输入，耗时取决于网络，
+        既不占用名额（不堵住其他合并），也不计入超时"""
+        self._streaming += 1
+        start = time.monotonic()
+        tail_start: float | None = None
+        proc = asyncio.create_task(exec_ffmpeg_cmd(cmd, pass_fds, started))
+        waiter = asyncio.create_task(input_done.wait())
+        try:
+            await asyncio.wait((proc, waiter), return_when=asyncio.FIRST_COMPLETED)
+            tail_start = time.monotonic()
+            return await asyncio.wait_for(proc, self.timeout or None)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.warning(f"ffmpeg 输入结束后 {self.timeout}s 未完成, 已结束进程")
+            raise RuntimeError(f"ffmpeg 执行超时 ({self.timeout}s)")
+        except RuntimeError:
+            self.failed += 1
+            raise
+        finally:
+            waiter.cancel()
+            if not proc.done():
+                # 调用方被取消：结束进程并等待回收
+                proc.cancel()
+                await asyncio.gather(proc, return_exceptions=True)
+            end = time.monotonic()
+            self._streaming -= 1
+            self.streamed += 1
+            self._stream_duration += end - start
+            self._stream_duration_max = max(self._stream_duration_max, end - start)
+            # 输入写完后的耗时，即 ffmpeg 实际独占处理的部分
+            self._stream_tail += end - tail_start if tail_start is not None else 0.0
+
+    def stats(self) -> dict:
+        jobs = sum(self._jobs.values())
+        durations = {
+            p.name: (
+                n,
+                round(self._duration[p] / n, 1),
+                round(self._duration_max[p], 1),
+            )
+            for p, n in self._jobs.items()
+            if n
+        }
+        if self.streamed:
+            durations["STREAM"] = (
+                self.streamed,
+                round(self._stream_duration / self.streamed, 1),
+                round(self._stream_duration_max, 1),
+            )
+        return {
+            "workers": self.workers,
+            "running": {p.name: n for p, n in self._running.items() if n},
+            "waiting": self._slots.waiting,
+            "avg_wait": round(self._wait_total / jobs, 2) if jobs else 0.0,
+            "streaming": self._streaming,
+            "streamed": self.streamed,
+            "stream_tail": (
+                round(self._stream_tail / self.streamed, 1) if self.streamed else 0.0
+            ),
+            "jobs": durations,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+        }
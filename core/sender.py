@@ -29,6 +29,7 @@ from .exception import (
     SizeLimitException,
     ZeroSizeException,
 )
+from .media_cache import MediaCache
 from .render import Renderer
 
 
@@ -47,9 +48,12 @@ class MessageSender:
     - 只负责“怎么发”
     """
 
-    def __init__(self, config: AstrBotConfig, renderer: Renderer):
+    def __init__(
+        self, config: AstrBotConfig, renderer: Renderer, media_cache: MediaCache
+    ):
         self.config = config
         self.renderer = renderer
+        self.media_cache = media_cache
 
     def _build_send_plan(self, result: ParseResult) -> dict:
         """
@@ -94,6 +98,12 @@ class MessageSender:
         }
 
 
+    async def _render_card(self, result: ParseResult) -> Path | None:
+        """渲染卡片并登记到媒体缓存，使其计入容量并参与淘汰"""
+        if image_path := await self.renderer.render_card(result):
+            self.media_cache.add(image_path, platform=result.platform.name)
+        return image_path
+
     async def _send_preview_card(
         self,
         event: AstrMessageEvent,
@@ -111,14 +121,16 @@ class MessageSender:
         if not plan["preview_card"]:
             return
 
-        if image_path := await self.renderer.render_card(result):
-            await event.send(event.chain_result([Image(str(image_path))]))
+        if image_path := await self._render_card(result):
+            with self.media_cache.using([image_path]):
+                await event.send(event.chain_result([Image(str(image_path))]))
 
 
     async def _build_segments(
         self,
         result: ParseResult,
         plan: dict,
+        paths: list[Path],
     ) -> list[BaseMessageComponent]:
         """
         根据发送计划构建消息段列表
@@ -126,12 +138,14 @@ class MessageSender:
         这里负责：
         - 下载媒体
         - 转换为 AstrBot 消息组件
+        - 将用到的本地文件记入 paths，发送期间防止被缓存淘汰
         """
         segs: list[BaseMessageComponent] = []
 
         # 合并转发时，卡片以内联形式作为一个消息段参与合并
         if plan["render_card"] and plan["force_merge"]:
-            if image_path := await self.renderer.render_card(result):
+            if image_path := await self._render_card(result):
+                paths.append(image_path)
                 segs.append(Image(str(image_path)))
 
         # 轻媒体处理
@@ -145,6 +159,7 @@ class MessageSender:
                     segs.append(Plain("此项媒体下载失败"))
                 continue
 
+            paths.append(path)
             match cont:
                 case ImageContent():
                     segs.append(Image(str(path)))
@@ -168,6 +183,7 @@ class MessageSender:
                     segs.append(Plain("此项媒体下载失败"))
                 continue
 
+            paths.append(path)
             match cont:
                 case VideoContent() | DynamicContent():
                     segs.append(Video(str(path)))
@@ -227,8 +243,10 @@ class MessageSender:
 
         await self._send_preview_card(event, result, plan)
 
-        segs = await self._build_segments(result, plan)
+        paths: list[Path] = []
+        segs = await self._build_segments(result, plan, paths)
         segs = self._merge_segments_if_needed(event, segs, plan["force_merge"])
 
         if segs:
-            await event.send(event.chain_result(segs))
+            with self.media_cache.using(paths):
+                await event.send(event.chain_result(segs))
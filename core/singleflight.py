@@ -0,0 +1,45 @@
+# singleflight.py
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    进行中请求合并器
+    - 同一 key 同时只执行一次
+    - 并发的后来者直接等待同一结果（含异常）
+    - 执行结束即移除，不做结果缓存
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+
+            async def runner() -> T:
+                return await func()
+
+            task = asyncio.create_task(runner(), name=f"singleflight | {key}")
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._pop(key, task))
+        # shield：单个等待者被取消时，不影响其他会话共享的任务
+        return await asyncio.shield(task)
+
+    def _pop(self, key: str, task: asyncio.Task[T]):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 等待者可能已全部取消，这里取走异常，避免 “never retrieved” 告警
+        if not task.cancelled():
+            task.exception()
@@ -1,14 +1,20 @@
 import asyncio
 import hashlib
 import json
+import os
+import re
+import uuid
 from collections import OrderedDict
 from http import cookiejar
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import TYPE_CHECKING, Any, TypeVar
 from urllib.parse import urlparse
 
 from astrbot.api import logger
 
+if TYPE_CHECKING:
+    from .scheduler import FFmpegPool
+
 K = TypeVar("K")
 V = TypeVar("V")
 
@@ -38,24 +44,160 @@ async def safe_unlink(path: Path):
         logger.warning(f"删除 {path} 失败")
 
 
-async def exec_ffmpeg_cmd(cmd: list[str]) -> None:
-    """执行命令
+TMP_MARK = ".dltmp"
+"""临时文件标记，下载 / 转码产物先写入带此标记的临时文件，完成后再改名"""
+
+
+def tmp_path_for(path: Path) -> Path:
+    """生成与目标同目录的临时文件路径
+
+    保留原后缀，以便 ffmpeg / yt-dlp 按后缀识别格式
+
+    Args:
+        path (Path): 目标文件路径
+
+    Returns:
+        Path: 临时文件路径
+    """
+    return path.with_name(f"{path.stem}.{uuid.uuid4().hex[:8]}{TMP_MARK}{path.suffix}")
+
+
+async def commit_tmp(tmp_path: Path, path: Path) -> Path:
+    """将写完的临时文件原子替换为目标文件
+
+    Args:
+        tmp_path (Path): 临时文件路径
+        path (Path): 目标文件路径
+
+    Returns:
+        Path: 目标文件路径
+    """
+    await asyncio.to_thread(os.replace, tmp_path, path)
+    return path
+
+
+async def discard_tmp(tmp_path: Path):
+    """删除临时文件及 yt-dlp 基于它派生的中间文件（.part、.ytdl、分轨等）"""
+    prefix = tmp_path.name.removesuffix(tmp_path.suffix)
+    leftovers = await asyncio.to_thread(
+        lambda: [p for p in tmp_path.parent.glob(f"{prefix}*") if p.is_file()]
+    )
+    await asyncio.gather(*(safe_unlink(p) for p in leftovers))
+
+
+def sweep_tmp_files(directory: Path) -> int:
+    """删除目录下残留的临时文件（异常退出遗留），返回删除数量
+
+    Args:
+        directory (Path): 目录
+
+    Returns:
+        int: 删除数量
+    """
+    count = 0
+    if not directory.is_dir():
+        return count
+    for path in directory.glob(f"*{TMP_MARK}*"):
+        try:
+            path.unlink()
+            count += 1
+        except OSError:
+            logger.warning(f"删除临时文件 {path} 失败")
+    return count
+
+
+async def exec_ffmpeg_cmd(
+    cmd: list[str],
+    pass_fds: tuple[int, ...] = (),
+    started: asyncio.Event | None = None,
+) -> str:
+    """执行命令，被取消时结束子进程
 
     Args:
         cmd (list[str]): 命令序列
+        pass_fds (tuple[int, ...]): 传给子进程的文件描述符（如管道读端）, 所有权随之转交：
+            子进程启动后（或启动失败时）在本进程关闭，子进程退出后写端即收到 EPIPE.
+            Defaults to ().
+        started (asyncio.Event | None): 子进程启动、pass_fds 已关闭后置位. Defaults to None.
+
+    Returns:
+        str: 标准错误输出
     """
     try:
         process = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            pass_fds=pass_fds,
         )
-        _, stderr = await process.communicate()
-        return_code = process.returncode
     except FileNotFoundError:
         raise RuntimeError("ffmpeg 未安装或无法找到可执行文件")
-
+    finally:
+        for fd in pass_fds:
+            os.close(fd)
+        if started is not None:
+            started.set()
+    try:
+        _, stderr = await process.communicate()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return_code = process.returncode
+
+    error_msg = stderr.decode(errors="replace").strip()
     if return_code != 0:
-        error_msg = stderr.decode().strip()
         raise RuntimeError(f"ffmpeg 执行失败: {error_msg}")
+    return error_msg
+
+
+FFMPEG_INPUT_ERRORS = (
+    "Error during demuxing",
+    "Invalid data found when processing input",
+)
+"""ffmpeg 读取输入出错但仍可能以 0 退出时的标准错误特征"""
+
+
+_STREAM_RE = re.compile(r"Stream #\d+:\d+.*?: (Video|Audio|Subtitle|Data):")
+
+
+async def probe_stream_types(path: Path) -> set[str]:
+    """读取媒体文件头，返回包含的流类型（video / audio / ...）
+
+    使用 ffmpeg -i 而非 ffprobe，只依赖 ffmpeg 本身
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-hide_banner",
+            "-i",
+            str(path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg 未安装或无法找到可执行文件")
+    _, stderr = await process.communicate()
+    return {
+        m.group(1).lower()
+        for m in _STREAM_RE.finditer(stderr.decode(errors="replace"))
+    }
+
+
+async def run_ffmpeg(
+    cmd: list[str],
+    pool: "FFmpegPool | None" = None,
+    pass_fds: tuple[int, ...] = (),
+    started: asyncio.Event | None = None,
+    input_done: asyncio.Event | None = None,
+) -> str:
+    """经 ffmpeg 任务执行器排队执行，未提供执行器时直接执行，返回标准错误输出"""
+    if pool is not None:
+        return await pool.run(
+            cmd, pass_fds=pass_fds, started=started, input_done=input_done
+        )
+    return await exec_ffmpeg_cmd(cmd, pass_fds, started)
 
 
 async def merge_av(
@@ -63,6 +205,7 @@ async def merge_av(
     v_path: Path,
     a_path: Path,
     output_path: Path,
+    pool: "FFmpegPool | None" = None,
 ) -> None:
     """合并视频和音频
 
@@ -70,13 +213,12 @@ async def merge_av(
         v_path (Path): 视频文件路径
         a_path (Path): 音频文件路径
         output_path (Path): 输出文件路径
+        pool (FFmpegPool | None): ffmpeg 任务执行器. Defaults to None.
     """
     target_path = output_path
-    if output_path in (v_path, a_path):
-        output_path = output_path.with_name(
-            f"{output_path.stem}_merged{output_path.suffix}"
-        )
-    logger.info(f"Merging {v_path.name} and {a_path.name} to {output_path.name}")
+    # 先写临时文件，输出与输入同名时也不会互相覆盖
+    output_path = tmp_path_for(target_path)
+    logger.info(f"Merging {v_path.name} and {a_path.name} to {target_path.name}")
 
     cmd = [
         "ffmpeg",
@@ -94,21 +236,81 @@ async def merge_av(
         str(output_path),
     ]
 
-    await exec_ffmpeg_cmd(cmd)
-    if output_path != target_path:
-        await safe_unlink(target_path)
-        await asyncio.to_thread(output_path.replace, target_path)
-        output_path = target_path
+    try:
+        await run_ffmpeg(cmd, pool)
+    except BaseException:
+        await safe_unlink(output_path)
+        raise
+    output_path = await commit_tmp(output_path, target_path)
     cleanup = [p for p in (v_path, a_path) if p != output_path]
     await asyncio.gather(*(safe_unlink(p) for p in cleanup))
     logger.info(f"Merged {output_path.name}, {fmt_size(output_path)}")
 
 
+async def merge_av_pipes(
+    *,
+    v_fd: int,
+    a_fd: int,
+    output_path: Path,
+    pool: "FFmpegPool | None" = None,
+    started: asyncio.Event | None = None,
+    input_done: asyncio.Event | None = None,
+) -> None:
+    """从管道读取视频和音频并合并，边下载边合并
+
+    输入需可顺序读取（moov 在前的 MP4 / DASH 分片），输出仍先写临时文件。
+    moov 在末尾的 MP4 无法从管道解析，ffmpeg 却可能只报错不改退出码，
+    因此合并后检查错误输出并确认音视频流俱在，否则抛出 RuntimeError
+
+    Args:
+        v_fd (int): 视频管道读端，ffmpeg 启动后在本进程关闭
+        a_fd (int): 音频管道读端，ffmpeg 启动后在本进程关闭
+        output_path (Path): 输出文件路径
+        pool (FFmpegPool | None): ffmpeg 任务执行器. Defaults to None.
+        started (asyncio.Event | None): ffmpeg 启动、管道读端已关闭后置位. Defaults to None.
+        input_done (asyncio.Event | None): 两路输入都已写完时置位，
+            执行器的超时从此时开始计算. Defaults to None.
+    """
+    tmp_path = tmp_path_for(output_path)
+    logger.info(f"Merging streams to {output_path.name}")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        f"pipe:{v_fd}",
+        "-i",
+        f"pipe:{a_fd}",
+        "-c",
+        "copy",
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        str(tmp_path),
+    ]
+
+    try:
+        stderr = await run_ffmpeg(cmd, pool, (v_fd, a_fd), started, input_done)
+        for line in stderr.splitlines():
+            if any(err in line for err in FFMPEG_INPUT_ERRORS):
+                raise RuntimeError(f"ffmpeg 读取管道输入出错: {line.strip()}")
+        streams = await probe_stream_types(tmp_path)
+        if not {"video", "audio"} <= streams:
+            raise RuntimeError(f"合并结果缺少音视频流: {sorted(streams)}")
+    except BaseException:
+        await safe_unlink(tmp_path)
+        raise
+    await commit_tmp(tmp_path, output_path)
+    logger.info(f"Merged {output_path.name}, {fmt_size(output_path)}")
+
+
 async def merge_av_h264(
     *,
     v_path: Path,
     a_path: Path,
     output_path: Path,
+    pool: "FFmpegPool | None" = None,
 ) -> None:
     """合并视频和音频，并使用 H.264 编码
 
@@ -116,10 +318,12 @@ async def merge_av_h264(
         v_path (Path): 视频文件路径
         a_path (Path): 音频文件路径
         output_path (Path): 输出文件路径
+        pool (FFmpegPool | None): ffmpeg 任务执行器. Defaults to None.
     """
     logger.info(
         f"Merging {v_path.name} and {a_path.name} to {output_path.name} with H.264"
     )
+    tmp_path = tmp_path_for(output_path)
 
     # 修改命令以确保视频使用 H.264 编码
     cmd = [
@@ -143,19 +347,27 @@ async def merge_av_h264(
         "0:v:0",
         "-map",
         "1:a:0",
-        str(output_path),
+        str(tmp_path),
     ]
 
-    await exec_ffmpeg_cmd(cmd)
+    try:
+        await run_ffmpeg(cmd, pool)
+    except BaseException:
+        await safe_unlink(tmp_path)
+        raise
+    await commit_tmp(tmp_path, output_path)
     await asyncio.gather(safe_unlink(v_path), safe_unlink(a_path))
     logger.info(f"Merged {output_path.name} with H.264, {fmt_size(output_path)}")
 
 
-async def encode_video_to_h264(video_path: Path) -> Path:
+async def encode_video_to_h264(
+    video_path: Path, pool: "FFmpegPool | None" = None
+) -> Path:
     """将视频重新编码到 h264
 
     Args:
         video_path (Path): 视频路径
+        pool (FFmpegPool | None): ffmpeg 任务执行器. Defaults to None.
 
     Returns:
         Path: 编码后的视频路径
@@ -163,6 +375,7 @@ async def encode_video_to_h264(video_path: Path) -> Path:
     output_path = video_path.with_name(f"{video_path.stem}_h264{video_path.suffix}")
     if output_path.exists():
         return output_path
+    tmp_path = tmp_path_for(output_path)
     cmd = [
         "ffmpeg",
         "-y",
@@ -174,9 +387,14 @@ async def encode_video_to_h264(video_path: Path) -> Path:
         "medium",
         "-crf",
         "23",
-        str(output_path),
+        str(tmp_path),
     ]
-    await exec_ffmpeg_cmd(cmd)
+    try:
+        await run_ffmpeg(cmd, pool)
+    except BaseException:
+        await safe_unlink(tmp_path)
+        raise
+    await commit_tmp(tmp_path, output_path)
     logger.info(f"视频重新编码为 H.264 成功: {output_path}, {fmt_size(output_path)}")
     await safe_unlink(video_path)
     return output_path
@@ -191,12 +409,15 @@ def fmt_size(file_path: Path) -> str:
     return f"大小: {file_path.stat().st_size / 1024 / 1024:.2f} MB"
 
 
-def generate_file_name(url: str, default_suffix: str = "") -> str:
+def generate_file_name(
+    url: str, default_suffix: str = "", key: str | None = None
+) -> str:
     """根据 url 生成文件名
 
     Args:
         url (str): url
         default_suffix (str): 默认后缀. Defaults to "".
+        key (str | None): 规范媒体键，提供时以其代替 url 计算文件名. Defaults to None.
 
     Returns:
         str: 文件名
@@ -204,12 +425,33 @@ def generate_file_name(url: str, default_suffix: str = "") -> str:
     # 根据 url 获取文件后缀
     path = Path(urlparse(url).path)
     suffix = path.suffix if path.suffix else default_suffix
-    # 获取 url 的 md5 值
-    url_hash = hashlib.md5(url.encode()).hexdigest()[:16]
+    # 获取 url（或规范媒体键）的 md5 值
+    url_hash = hashlib.md5((key or url).encode()).hexdigest()[:16]
     file_name = f"{url_hash}{suffix}"
     return file_name
 
 
+def normalize_link(link: str) -> str:
+    """规范化链接，用于判断是否为同一链接
+
+    去掉协议头、www 前缀与末尾的斜杠，host 统一小写
+
+    Args:
+        link (str): 链接
+
+    Returns:
+        str: 规范化后的链接
+    """
+    link = link.strip()
+    for scheme in ("https://", "http://"):
+        if link.lower().startswith(scheme):
+            link = link[len(scheme) :]
+            break
+    host, sep, rest = link.partition("/")
+    host = host.lower().removeprefix("www.")
+    return f"{host}{sep}{rest}".rstrip("/")
+
+
 def save_cookies_with_netscape(cookies_str: str, file_path: Path, domain: str):
     """以 netscape 格式保存 cookies
 
@@ -0,0 +1,349 @@
+# ytdlp_pool.py
+
+import asyncio
+import copy
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, TypeVar
+
+import yt_dlp
+
+from astrbot.api import logger
+
+T = TypeVar("T")
+
+YdlFunc = Callable[..., T]
+"""在借出的 YoutubeDL 上执行的操作：func(ydl, *args)
+
+进程模式下需可 pickle（模块级函数），参数与返回值同样需可 pickle
+"""
+
+
+MANAGER_ERRORS = (EOFError, BrokenPipeError, OSError)
+"""Manager 进程退出后，经其代理访问队列时可能抛出的异常"""
+
+
+# region -------------------- 可在工作进程中执行的操作 --------------------
+
+
+def ydl_extract_info(
+    ydl: yt_dlp.YoutubeDL, url: str, remove_private_keys: bool = False
+) -> dict[str, Any] | None:
+    """提取信息，返回可 JSON 化（可跨进程传递）的副本"""
+    return ydl.sanitize_info(
+        ydl.extract_info(url, download=False), remove_private_keys
+    )
+
+
+def ydl_download(
+    ydl: yt_dlp.YoutubeDL, url: str, info: dict[str, Any] | None = None
+):
+    """下载；有已提取的 info 时经 process_ie_result 下载，
+    媒体地址失效等下载错误时退回按 url 重新提取"""
+    if info is not None:
+        try:
+            ydl.process_ie_result(copy.deepcopy(info), download=True)
+            return
+        except yt_dlp.utils.DownloadError as exc:
+            logger.warning(f"已提取的信息下载失败, 重新提取: {exc}")
+    ydl.download([url])
+
+
+# endregion
+
+
+class _Pooled:
+    __slots__ = ("ydl", "uses", "cookie_mtime")
+
+    def __init__(self, ydl: yt_dlp.YoutubeDL, cookie_mtime: int | None):
+        self.ydl = ydl
+        self.uses = 0
+        self.cookie_mtime = cookie_mtime
+
+
+class YoutubeDLPool:
+    """
+    预热的 YoutubeDL 实例池
+    - 按选项档位（代理、Cookie 文件、请求头及其余构造选项）分组复用，
+      省去每次调用重新加载提取器、Cookie、网络组件的开销
+    - 实例一次只借给一个工作线程；输出模板、进度回调等逐次选项在借出时设置
+    - 使用满 N 次、Cookie 文件变化或调用出错后关闭重建；关闭时不回写 Cookie 文件
+    - 可选进程模式：操作在独立的工作进程中执行（各进程内同样复用实例），
+      签名解密、分片处理等 CPU 密集工作不再与事件循环争抢 GIL；
+      进度回调经队列转发回本进程调用
+    """
+
+    PER_CALL = frozenset({"outtmpl", "progress_hooks"})
+    """每次调用不同、不参与分组的选项"""
+    MAX_PROFILES = 8
+    """保留空闲实例的档位数上限，超出时关闭最久未用档位的实例"""
+
+    def __init__(self, config: dict):
+        self.max_uses: int = config.get("ytdlp_pool_max_uses", 50)
+        # 每个档位保留的空闲实例数，0 表示不复用
+        self.max_idle: int = config.get("ytdlp_pool_size", 2)
+        self._idle: OrderedDict[str, list[_Pooled]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 工作进程数，0 表示在本进程的线程中执行
+        self.processes: int = config.get("ytdlp_processes", 0)
+        self._executor: ProcessPoolExecutor | None = None
+        self._manager: Any = None
+
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.remote_calls = 0
+
+    async def run(self, opts: dict[str, Any], func: YdlFunc[T], *args: Any) -> T:
+        """借出实例执行 func(ydl, *args), 实例在 func 返回后才归还
+
+        调用方被取消时操作仍会执行完毕，实例不会被同时用于两个操作
+        """
+        if self.processes <= 0:
+            return await asyncio.to_thread(self._run, opts, func, args)
+        return await self._run_remote(opts, func, args)
+
+    def _run(self, opts: dict[str, Any], func: YdlFunc[T], args: tuple) -> T:
+        key = self._profile(opts)
+        pooled = self._acquire(key, opts)
+        ydl = pooled.ydl
+        hooks = opts.get("progress_hooks") or []
+        if "outtmpl" in opts:
+            # 构造时已补全各类模板，这里只替换默认模板
+            ydl.params["outtmpl"] = {
+                **ydl.params["outtmpl"],
+                "default": opts["outtmpl"],
+            }
+        for hook in hooks:
+            ydl.add_progress_hook(hook)
+        ok = False
+        try:
+            result = func(ydl, *args)
+            ok = True
+            return result
+        finally:
+            # YoutubeDL 只提供添加回调的接口，移除需操作内部列表
+            for hook in hooks:
+                ydl._progress_hooks.remove(hook)
+            self._release(key, pooled, ok)
+
+    # region -------------------- 进程模式 --------------------
+
+    async def _run_remote(
+        self, opts: dict[str, Any], func: YdlFunc[T], args: tuple
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        hooks = opts.get("progress_hooks") or []
+        opts = {k: v for k, v in opts.items() if k != "progress_hooks"}
+        executor = await asyncio.to_thread(self._get_executor)
+        self.remote_calls += 1
+        queue = None
+        relay = None
+        if hooks:
+            queue = await asyncio.to_thread(self._manager.Queue)
+            relay = asyncio.create_task(
+                asyncio.to_thread(_relay_progress, queue, hooks)
+            )
+        try:
+            return await loop.run_in_executor(
+                executor, _worker_run, opts, func, args, queue
+            )
+        except BrokenProcessPool:
+            # 工作进程异常退出，下次调用时重建；先结束转发再关闭 Manager
+            logger.warning("yt-dlp 工作进程异常退出，将重建进程池")
+            await _stop_relay(queue, relay)
+            queue = relay = None
+            self._shutdown_executor()
+            raise RuntimeError("yt-dlp 工作进程异常退出")
+        finally:
+            # 工作进程的进度先于结果到达队列，结束标记排在最后
+            await _stop_relay(queue, relay)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """惰性创建工作进程池；spawn 启动，不继承事件循环与线程状态"""
+        with self._lock:
+            if self._executor is None:
+                ctx = multiprocessing.get_context("spawn")
+                self._manager = ctx.Manager()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(
+                        {
+                            "ytdlp_pool_size": self.max_idle,
+                            "ytdlp_pool_max_uses": self.max_uses,
+                        },
+                    ),
+                )
+            return self._executor
+
+    def _shutdown_executor(self):
+        with self._lock:
+            executor, manager = self._executor, self._manager
+            self._executor = self._manager = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+
+    # endregion
+
+    def _profile(self, opts: dict[str, Any]) -> str:
+        return json.dumps(
+            {k: v for k, v in opts.items() if k not in self.PER_CALL},
+            sort_keys=True,
+            default=str,
+        )
+
+    @staticmethod
+    def _cookie_mtime(opts: dict[str, Any]) -> int | None:
+        if not (cookiefile := opts.get("cookiefile")):
+            return None
+        try:
+            return os.stat(cookiefile).st_mtime_ns
+        except OSError:
+            return None
+
+    def _acquire(self, key: str, opts: dict[str, Any]) -> _Pooled:
+        mtime = self._cookie_mtime(opts)
+        stale: list[_Pooled] = []
+        pooled = None
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                candidate = idle.pop()
+                if candidate.cookie_mtime == mtime:
+                    pooled = candidate
+                    break
+                stale.append(candidate)
+        self._close(stale)
+        if pooled is not None:
+            self.reused += 1
+            return pooled
+        # 关闭旧实例后再读取，记录的是新实例实际加载的 Cookie 文件版本
+        mtime = self._cookie_mtime(opts)
+        ydl = yt_dlp.YoutubeDL(
+            {k: v for k, v in opts.items() if k not in self.PER_CALL}
+        )
+        self.created += 1
+        return _Pooled(ydl, mtime)
+
+    def _release(self, key: str, pooled: _Pooled, ok: bool):
+        pooled.uses += 1
+        closing = [pooled]
+        if ok and pooled.uses < self.max_uses:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                self._idle.move_to_end(key)
+                if len(idle) < self.max_idle:
+                    idle.append(pooled)
+                    closing = []
+                while len(self._idle) > self.MAX_PROFILES:
+                    _, evicted = self._idle.popitem(last=False)
+                    closing.extend(evicted)
+        self._close(closing)
+
+    def _close(self, pooled: list[_Pooled]):
+        for item in pooled:
+            self.recycled += 1
+            # YoutubeDL.close() 会把实例持有的旧 Cookie 写回 cookiefile，
+            # 覆盖外部的更新并改动文件时间，使其余实例全部被判为过期；
+            # Cookie 文件由用户与各解析器维护，池内实例只读不写
+            item.ydl.params.pop("cookiefile", None)
+            try:
+                item.ydl.close()
+            except Exception:
+                logger.debug("关闭 YoutubeDL 实例失败", exc_info=True)
+
+    def close(self):
+        """关闭所有空闲实例及工作进程"""
+        with self._lock:
+            pooled = [item for idle in self._idle.values() for item in idle]
+            self._idle.clear()
+        self._close(pooled)
+        self._shutdown_executor()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "idle": sum(len(v) for v in self._idle.values()),
+            "created": self.created,
+            "reused": self.reused,
+            "recycled": self.recycled,
+            "processes": self.processes,
+            "remote_calls": self.remote_calls,
+        }
+
+
+# region -------------------- 工作进程 --------------------
+
+_worker_pool: YoutubeDLPool | None = None
+"""工作进程内的实例池（线程模式）"""
+
+
+def _init_worker(config: dict):
+    global _worker_pool
+    _worker_pool = YoutubeDLPool(config)
+
+
+def _worker_run(
+    opts: dict[str, Any], func: YdlFunc[T], args: tuple, queue: Any
+) -> T:
+    assert _worker_pool is not None
+    if queue is not None:
+        opts = {**opts, "progress_hooks": [partial(_forward_progress, queue)]}
+    try:
+        return _worker_pool._run(opts, func, args)
+    except Exception as exc:
+        # yt-dlp 的异常携带 traceback 等不可 pickle 的对象，转为纯文本传回
+        raise RuntimeError(f"{type(exc).__name__}: {exc}") from None
+
+
+def _forward_progress(queue: Any, d: dict[str, Any]):
+    """只转发基本类型字段（状态、百分比、速度、剩余时间等）"""
+    queue.put(
+        {
+            k: v
+            for k, v in d.items()
+            if v is None or isinstance(v, str | int | float | bool)
+        }
+    )
+
+
+def _relay_progress(queue: Any, hooks: list[Callable[[dict], Any]]):
+    """在本进程的线程中取出转发的进度并调用原回调，收到 None 或队列失效时结束"""
+    while True:
+        try:
+            d = queue.get()
+        except MANAGER_ERRORS:
+            return
+        if d is None:
+            return
+        for hook in hooks:
+            try:
+                hook(d)
+            except Exception:
+                logger.exception("yt-dlp 进度回调出错")
+
+
+async def _stop_relay(queue: Any, relay: asyncio.Task | None):
+    """放入结束标记并等待转发线程退出；Manager 已失效时不掩盖原异常"""
+    if queue is None or relay is None:
+        return
+    try:
+        await asyncio.to_thread(queue.put, None)
+    except MANAGER_ERRORS:
+        # 转发线程的 get 同样会失败退出
+        pass
+    await relay
+
+
+# endregion
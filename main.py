@@ -1,10 +1,13 @@
 # main.py
 
 import asyncio
+import contextlib
+import json
 import re
 import time
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
 from astrbot.api import logger
 from astrbot.api.event import filter
@@ -19,12 +22,24 @@ from astrbot.core.platform.sources.aiocqhttp.aiocqhttp_message_event import (
 from .core.arbiter import ArbiterContext, EmojiLikeArbiter
 from .core.clean import CacheCleaner
 from .core.cookie_sync import CookieSyncer
+from .core.data import ParseResult
 from .core.debounce import Debouncer
-from .core.download import Downloader
+from .core.download import (
+    DownloadGate,
+    Downloader,
+    download_gate,
+    download_platform,
+    download_resource,
+)
+from .core.exception import OverloadException
+from .core.matcher import KeywordMatcher
 from .core.parsers import BaseParser, BilibiliParser
 from .core.render import Renderer
+from .core.result_cache import ParseResultCache
+from .core.scheduler import ParseScheduler
 from .core.sender import MessageSender
-from .core.utils import extract_json_url
+from .core.singleflight import SingleFlight
+from .core.utils import extract_json_url, normalize_link
 
 
 @register("astrbot_plugin_zidongjiexiplusyoutubexiazai", "constansino", "万能解析,yt4khdr下载,默认白名单模式,自用基于原版万能解析增强", "1.0.0")
@@ -75,6 +90,9 @@ class ParserPlugin(Star):
         # 关键词 -> 正则 列表
         self.key_pattern_list: list[tuple[str, re.Pattern[str]]] = []
 
+        # 单趟关键词匹配器
+        self.matcher = KeywordMatcher([])
+
         # 渲染器
         self.renderer = Renderer(config)
 
@@ -85,13 +103,27 @@ class ParserPlugin(Star):
         self.debouncer = Debouncer(config)
 
         # 仲裁器
-        self.arbiter = EmojiLikeArbiter()
+        self.arbiter = EmojiLikeArbiter(
+            adaptive=config.get("arbiter_adaptive", False),
+            solo_rounds=config.get("arbiter_solo_rounds", 0),
+        )
+
+        # 跨会话合并同一链接的并发解析
+        self.parse_flight: SingleFlight[ParseResult] = SingleFlight()
+
+        # 解析结果缓存
+        self.result_cache = ParseResultCache(config)
+
+        # 解析准入控制
+        self.scheduler = ParseScheduler(config)
 
         # 消息发送器
-        self.sender = MessageSender(config, self.renderer)
+        self.sender = MessageSender(config, self.renderer, self.downloader.media_cache)
 
         # 缓存清理器
-        self.cleaner = CacheCleaner(self.context, self.config)
+        self.cleaner = CacheCleaner(
+            self.context, self.config, self.downloader.media_cache
+        )
         # Cookie 同步器
         self.cookie_syncer = CookieSyncer(self.context, self.config)
         
@@ -100,25 +132,42 @@ class ParserPlugin(Star):
         # 正在进行的 ytdlp 任务
         self.active_ytd_tasks: dict[str, dict] = {} # user_key -> {status, progress_str}
 
+        # 会话开关、忽略前缀等热路径配置的内存索引
+        self._reload_session_index()
+        # 合并写入配置的后台任务
+        self._save_task: asyncio.Task | None = None
+        # 有尚未落盘的配置修改
+        self._config_dirty = False
+        # 跳过合并等待、立即写入（卸载时）
+        self._save_now = asyncio.Event()
+
     async def initialize(self):
         """加载、重载插件时触发"""
         # 加载x渲染器资源
         await asyncio.to_thread(Renderer.load_resources)
         # 注册解析器
         self._register_parser()
+        # 缓存对账并启动后台清理
+        await self.cleaner.start()
 
     async def terminate(self):
         """插件卸载时触发"""
-        # 关下载器里的会话
-        await self.downloader.close()
         # 关所有解析器里的会话 (去重后的实例)
         unique_parsers = set(self.parser_map.values())
         for parser in unique_parsers:
             await parser.close_session()
+        # 关下载器里的会话及共享连接池
+        await self.downloader.close()
         # 关缓存清理器
         await self.cleaner.stop()
         # 关 Cookie 同步器
         await self.cookie_syncer.stop()
+        # 保存防抖状态
+        await asyncio.to_thread(self.debouncer.save)
+        # 落盘尚未写入的配置
+        if self._save_task and not self._save_task.done():
+            self._save_now.set()
+            await self._save_task
 
     def _register_parser(self):
         """注册解析器"""
@@ -135,6 +184,7 @@ class ParserPlugin(Star):
         for _cls in enabled_classes:
             parser = _cls(self.config, self.downloader)
             platform_names.append(parser.platform.display_name)
+            self.downloader.media_keys[parser.platform.name] = parser.media_key
             for keyword, _ in _cls._key_patterns:
                 self.parser_map[keyword] = parser
         logger.info(f"启用平台: {'、'.join(platform_names)}")
@@ -150,6 +200,69 @@ class ParserPlugin(Star):
         keywords = [kw for kw, _ in patterns]
         logger.debug(f"关键词-正则对已生成：{keywords}")
         self.key_pattern_list = patterns
+        self.matcher = KeywordMatcher(patterns)
+
+    def _reload_session_index(self):
+        """由配置重建会话集合、忽略前缀等内存索引，配置变更后调用"""
+        self.parsing_mode: str = self.config.get("parsing_mode", "白名单")
+        self.enabled_sessions: set[str] = set(self.config.get("enabled_sessions", []))
+        self.disabled_sessions: set[str] = set(
+            self.config.get("disabled_sessions", [])
+        )
+        # str.startswith 接受元组，一次调用完成全部前缀判断
+        self.ignore_prefixes: tuple[str, ...] = tuple(
+            p for p in self.config.get("ignore_prefixes", ["/ytd"]) if p
+        )
+        self.multi_link_mode: bool = self.config.get("multi_link_mode", False)
+        self.multi_link_max: int = max(1, self.config.get("multi_link_max", 3))
+        self.speculative_parse: bool = self.config.get("speculative_parse", False)
+
+    def _update_sessions(self, key: str, umo: str, add: bool) -> bool:
+        """增删会话列表，同步内存索引并合并写入配置，返回是否有变化"""
+        index = (
+            self.enabled_sessions
+            if key == "enabled_sessions"
+            else self.disabled_sessions
+        )
+        if (umo in index) == add:
+            return False
+        sessions = list(self.config.get(key, []))
+        if add:
+            index.add(umo)
+            sessions.append(umo)
+        else:
+            index.discard(umo)
+            sessions = [s for s in sessions if s != umo]
+        self.config[key] = sessions
+        self._schedule_save_config()
+        return True
+
+    def _schedule_save_config(self, delay: float = 1.0):
+        """合并短时间内的多次配置修改，在线程中写入一次；
+        写入期间又有修改时，写完后再写一次"""
+        self._config_dirty = True
+        if self._save_task and not self._save_task.done():
+            return
+
+        async def save():
+            while self._config_dirty:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._save_now.wait(), delay)
+                self._config_dirty = False
+                # 在事件循环中序列化出快照，线程只负责写文件，
+                # 避免与事件循环上的配置修改并发读写
+                text = json.dumps(self.config, indent=2, ensure_ascii=False)
+                await asyncio.to_thread(self._write_config, text)
+
+        self._save_task = asyncio.create_task(save())
+
+    def _write_config(self, text: str):
+        """按 AstrBotConfig.save_config 的格式写入配置文件"""
+        try:
+            with open(self.config.config_path, "w", encoding="utf-8-sig") as f:
+                f.write(text)
+        except OSError:
+            logger.exception("配置写入失败")
 
     def _get_parser_by_type(self, parser_type):
         for parser in self.parser_map.values():
@@ -162,10 +275,8 @@ class ParserPlugin(Star):
         """消息的统一入口"""
         # 防止与 /ytd 指令或其他配置的前缀冲突
         msg_str = event.message_str.strip()
-        ignore_prefixes = self.config.get("ignore_prefixes", ["/ytd"])
-        for prefix in ignore_prefixes:
-            if msg_str.startswith(prefix):
-                return
+        if self.ignore_prefixes and msg_str.startswith(self.ignore_prefixes):
+            return
 
         # 优先处理 ytdlp 会话
         try:
@@ -177,15 +288,14 @@ class ParserPlugin(Star):
             pass
 
         umo = event.unified_msg_origin
-        mode = self.config.get("parsing_mode", "白名单")
 
-        if mode == "黑名单":
+        if self.parsing_mode == "黑名单":
             # 黑名单模式：如果在禁用列表中，则不解析
-            if umo in self.config.get("disabled_sessions", []):
+            if umo in self.disabled_sessions:
                 return
         else:
             # 白名单模式（默认）：如果不在启用列表中，则不解析
-            if umo not in self.config.get("enabled_sessions", []):
+            if umo not in self.enabled_sessions:
                 return
 
         # 消息链
@@ -211,107 +321,200 @@ class ParserPlugin(Star):
             return
 
         # 核心匹配逻辑 ：关键词 + 正则双重判定，汇集了所有解析器的正则对。
-        keyword: str = ""
-        searched: re.Match[str] | None = None
-        for kw, pat in self.key_pattern_list:
-            if kw not in text:
-                continue
-            if m := pat.search(text):
-                keyword, searched = kw, m
-                break
-        if searched is None:
+        if self.multi_link_mode:
+            # 多链接模式：按出现顺序收集全部链接
+            matches = self.matcher.find_all(text)[: self.multi_link_max]
+        else:
+            matched = self.matcher.search(text)
+            matches = [matched] if matched else []
+        if not matches:
             return
-        logger.debug(f"匹配结果: {keyword}, {searched}")
+        logger.debug(f"匹配结果: {matches}")
 
         # 仲裁机制
+        arbiter_args: tuple[Any, ArbiterContext] | None = None
         if isinstance(event, AiocqhttpMessageEvent) and not event.is_private_chat():
             raw = event.message_obj.raw_message
             if not isinstance(raw, dict):
                 logger.warning(f"Unexpected raw_message type: {type(raw)}")
                 return
-            is_win = await self.arbiter.compete(
-                bot=event.bot,
-                ctx=ArbiterContext(
+            arbiter_args = (
+                event.bot,
+                ArbiterContext(
                     message_id=int(raw["message_id"]),
                     msg_time=int(raw["time"]),
                     self_id=int(raw["self_id"]),
+                    group_id=int(raw["group_id"]) if raw.get("group_id") else None,
                 ),
             )
+
+        # 推测解析：仲裁期间提前解析元数据，媒体下载待仲裁胜出后放行
+        speculative: list[tuple[asyncio.Task[ParseResult], DownloadGate] | None] = [
+            None
+        ] * len(matches)
+        if arbiter_args and self.speculative_parse:
+            speculative = [self._start_speculative_parse(kw, m) for kw, m in matches]
+
+        if arbiter_args:
+            bot, ctx = arbiter_args
+            timings: dict[str, float] = {}
+            try:
+                is_win = await self.arbiter.compete(bot=bot, ctx=ctx, timings=timings)
+            except BaseException:
+                self._cancel_speculative(speculative)
+                raise
+            logger.debug(f"仲裁各阶段耗时: {timings}")
             if not is_win:
+                self._cancel_speculative(speculative)
                 logger.debug("Bot在仲裁中输了, 跳过解析")
                 return
             logger.debug("Bot在仲裁中胜出, 准备解析...")
 
         # 基于link防抖
-        link = searched.group(0)
-        if self.debouncer.hit_link(umo, link):
-            logger.warning(f"[链接防抖] 链接 {link} 在防抖时间内，跳过解析")
-            return
-
-        # 解析
-        parse_res = await self.parser_map[keyword].parse(keyword, searched)
-
-        # 基于资源ID防抖
-        resource_id = parse_res.get_resource_id()
-        if self.debouncer.hit_resource(umo, resource_id):
-            logger.warning(f"[资源防抖] 资源 {resource_id} 在防抖时间内，跳过发送")
+        pending: list[tuple[str, re.Match[str]]] = []
+        tasks: list[asyncio.Task[ParseResult]] = []
+        for (keyword, searched), spec in zip(matches, speculative):
+            link = searched.group(0)
+            if self.debouncer.hit_link(umo, link):
+                logger.warning(f"[链接防抖] 链接 {link} 在防抖时间内，跳过解析")
+                self._cancel_speculative([spec])
+                continue
+            pending.append((keyword, searched))
+            if spec is None:
+                # 解析：所有链接并发解析，互不阻塞
+                tasks.append(asyncio.create_task(self._parse(keyword, searched)))
+            else:
+                task, gate = spec
+                gate.open()
+                tasks.append(task)
+        if not pending:
             return
 
-        # 发送
-        await self.sender.send_parse_result(event, parse_res)
+        try:
+            # 按链接出现顺序依次发送
+            for (_, searched), task in zip(pending, tasks):
+                try:
+                    parse_res = await task
+                except OverloadException:
+                    continue
+                except Exception as e:
+                    if len(tasks) == 1:
+                        raise
+                    logger.warning(f"[多链接] 链接 {searched.group(0)} 解析失败: {e}")
+                    continue
+
+                # 基于资源ID防抖
+                resource_id = parse_res.get_resource_id()
+                if self.debouncer.hit_resource(umo, resource_id):
+                    logger.warning(
+                        f"[资源防抖] 资源 {resource_id} 在防抖时间内，跳过发送"
+                    )
+                    continue
+
+                # 发送
+                await self.sender.send_parse_result(event, parse_res)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _parse(
+        self,
+        keyword: str,
+        searched: re.Match[str],
+        gate: DownloadGate | None = None,
+    ) -> ParseResult:
+        """解析链接，优先命中解析结果缓存
+
+        同一资源在多个会话中同时出现时只解析一次，后来者共享首个调用的
+        ParseResult 及其已在进行的媒体下载任务，各会话仍各自渲染、发送
+
+        传入 gate 表示推测解析：不参与跨会话合并，闸门打开后才写入缓存
+        """
+        parser = self.parser_map[keyword]
+        platform = parser.platform.name
+        cache_key = parser.get_cache_key(keyword, searched)
+
+        if cache_key and self.result_cache.enabled:
+            if parse_res := self.result_cache.get(platform, cache_key):
+                logger.debug(
+                    f"[解析缓存] 命中 {platform}:{cache_key}, {self.result_cache.stats()}"
+                )
+                return parse_res
+
+        async def do_parse() -> ParseResult:
+            # 解析期间创建的下载任务继承平台与资源上下文，用于下载策略与缓存索引
+            token = download_platform.set(platform)
+            res_token = download_resource.set(cache_key)
+            try:
+                async with self.scheduler.slot(platform):
+                    parse_res = await parser.parse(keyword, searched)
+            finally:
+                download_resource.reset(res_token)
+                download_platform.reset(token)
+            if cache_key:
+                if gate is not None:
+                    await gate.wait()
+                self.result_cache.put(platform, cache_key, parse_res, parser.cache_ttl)
+            return parse_res
+
+        if gate is not None:
+            # 仲裁落败时下载任务会被取消，不能共享给其他会话
+            return await do_parse()
+
+        flight_key = (
+            f"{platform}:{cache_key}" if cache_key else normalize_link(searched.group(0))
+        )
+        return await self.parse_flight.do(flight_key, do_parse)
+
+    def _start_speculative_parse(
+        self, keyword: str, searched: re.Match[str]
+    ) -> tuple[asyncio.Task[ParseResult], DownloadGate]:
+        """启动推测解析，期间创建的下载任务被闸门挡住"""
+        gate = DownloadGate()
+        token = download_gate.set(gate)
+        try:
+            task = asyncio.create_task(self._parse(keyword, searched, gate))
+        finally:
+            download_gate.reset(token)
+        return task, gate
+
+    @staticmethod
+    def _cancel_speculative(
+        speculative: list[tuple[asyncio.Task[ParseResult], DownloadGate] | None],
+    ):
+        """取消推测解析及其挂起的下载"""
+        for spec in speculative:
+            if spec is None:
+                continue
+            task, gate = spec
+            task.cancel()
+            gate.cancel()
 
     @filter.command("开启解析")
     async def open_parser(self, event: AstrMessageEvent):
         """开启当前会话的解析"""
         umo = event.unified_msg_origin
-        mode = self.config.get("parsing_mode", "白名单")
-        
-        if mode == "黑名单":
-            sessions = self.config.get("disabled_sessions", [])
-            if umo in sessions:
-                sessions.remove(umo)
-                self.config["disabled_sessions"] = sessions
-                self.config.save_config()
-                yield event.plain_result("解析已开启")
-            else:
-                yield event.plain_result("解析已开启，无需重复开启")
+
+        if self.parsing_mode == "黑名单":
+            changed = self._update_sessions("disabled_sessions", umo, add=False)
         else:
             # 白名单模式
-            sessions = self.config.get("enabled_sessions", [])
-            if umo not in sessions:
-                sessions.append(umo)
-                self.config["enabled_sessions"] = sessions
-                self.config.save_config()
-                yield event.plain_result("解析已开启")
-            else:
-                yield event.plain_result("解析已开启，无需重复开启")
+            changed = self._update_sessions("enabled_sessions", umo, add=True)
+        yield event.plain_result("解析已开启" if changed else "解析已开启，无需重复开启")
 
     @filter.command("关闭解析")
     async def close_parser(self, event: AstrMessageEvent):
         """关闭当前会话的解析"""
         umo = event.unified_msg_origin
-        mode = self.config.get("parsing_mode", "白名单")
-        
-        if mode == "黑名单":
-            sessions = self.config.get("disabled_sessions", [])
-            if umo not in sessions:
-                sessions.append(umo)
-                self.config["disabled_sessions"] = sessions
-                self.config.save_config()
-                yield event.plain_result("解析已关闭")
-            else:
-                yield event.plain_result("解析已关闭，无需重复关闭")
+
+        if self.parsing_mode == "黑名单":
+            changed = self._update_sessions("disabled_sessions", umo, add=True)
         else:
             # 白名单模式
-            sessions = self.config.get("enabled_sessions", [])
-            if umo in sessions:
-                sessions.remove(umo)
-                self.config["enabled_sessions"] = sessions
-                self.config.save_config()
-                yield event.plain_result("解析已关闭")
-            else:
-                yield event.plain_result("解析已关闭，无需重复关闭")
-    
+            changed = self._update_sessions("enabled_sessions", umo, add=False)
+        yield event.plain_result("解析已关闭" if changed else "解析已关闭，无需重复关闭")
+
     @filter.command("ytd")
     async def ytd_cmd(self, event: AstrMessageEvent, url: str = ""):
         """yt-dlp 手动选格式下载。如果不加参数，查询当前进度。"""
@@ -474,7 +677,8 @@ class ParserPlugin(Star):
             
             # 尝试发送，忽略发送过程中的超时错误
             try:
-                await event.send(event.chain_result([Video(str(path))]))
+                with self.downloader.media_cache.using([path]):
+                    await event.send(event.chain_result([Video(str(path))]))
                 self.active_ytd_tasks[user_key]["progress_str"] = "发送完成"
             except Exception as e:
                 logger.warning(f"Send video failed (possibly timeout, but upload likely continues): {e}")
@@ -484,6 +688,7 @@ class ParserPlugin(Star):
             delete_after = self.config.get("ytd_delete_after_send", True)
             if delete_after and path and path.exists():
                 path.unlink()
+                self.downloader.media_cache.discard(path)
                 
         except Exception as e:
             logger.exception("Manual ytdlp download failed")
@@ -502,6 +707,84 @@ class ParserPlugin(Star):
         async for msg in parser.check_qr_state():
             yield event.plain_result(msg)
 
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("解析状态")
+    async def parse_status(self, event: AstrMessageEvent):
+        """查看解析队列与缓存统计"""
+        sched = self.scheduler.stats()
+        cache = self.result_cache.stats()
+        http = self.downloader.http.stats()
+        dl = self.downloader.scheduler.stats()
+        media = self.downloader.media_cache.stats()
+        ff = self.downloader.ffmpeg.stats()
+        ydl = self.downloader.ytdlp.stats()
+        info = self.downloader.info_cache.stats()
+        running = "、".join(f"{k}×{v}" for k, v in sched["running"].items()) or "无"
+        lines = [
+            f"排队中: {sched['waiting']}/{self.scheduler.max_queue}",
+            f"进行中: {running}",
+            f"已放行: {sched['admitted']}，已丢弃: {sched['shed']}",
+            f"排队耗时: 平均 {sched['avg_wait']}s，最长 {sched['max_wait']}s",
+            f"解析缓存: {cache['entries']} 条，命中 {cache['hits']}，"
+            f"未命中 {cache['misses']}，失效 {cache['invalidations']}",
+            f"连接池: 使用中 {http['acquired']}，空闲 {http['idle']}，"
+            f"主机 {http['hosts']}",
+            f"下载中: {'、'.join(f'{k}×{v}' for k, v in dl['running'].items()) or '无'}，"
+            f"排队 {dl['waiting']}，限速 {dl['limit'] or '无'} MB/s，"
+            f"限速等待 {dl['throttled']}s",
+            f"媒体缓存: {media['files']} 个文件，"
+            f"{media['usage'] / 1024 / 1024:.1f}/{media['max'] / 1024 / 1024:.0f} MB，"
+            f"命中 {media['hits']}，使用中 {media['in_use']}，"
+            f"已淘汰 {media['evicted_files']} 个 "
+            f"({media['evicted_bytes'] / 1024 / 1024:.1f} MB)",
+        ]
+        for name, (count, size) in sorted(
+            self.downloader.media_cache.platform_stats().items(),
+            key=lambda item: -item[1][1],
+        ):
+            lines.append(f"- {name}: {count} 个文件，{size / 1024 / 1024:.1f} MB")
+        lines.append(
+            f"ffmpeg: {'、'.join(f'{k}×{v}' for k, v in ff['running'].items()) or '无'}"
+            f"/{ff['workers']}，排队 {ff['waiting']}，平均排队 {ff['avg_wait']}s，"
+            f"边下边合 {ff['streaming']}（累计 {ff['streamed']}，"
+            f"输入结束后平均 {ff['stream_tail']}s），"
+            f"失败 {ff['failed']}，超时 {ff['timed_out']}"
+        )
+        lines.extend(
+            f"- {name}: {count} 次，平均 {avg}s，最长 {peak}s"
+            for name, (count, avg, peak) in ff["jobs"].items()
+        )
+        lines.append(
+            f"yt-dlp 实例: 空闲 {ydl['idle']}，新建 {ydl['created']}，"
+            f"复用 {ydl['reused']}，回收 {ydl['recycled']}"
+            + (
+                f"，工作进程 {ydl['processes']}，进程内调用 {ydl['remote_calls']}"
+                if ydl["processes"]
+                else ""
+            )
+        )
+        lines.append(
+            f"视频信息缓存: {info['entries']} 条，命中 {info['hits']}，"
+            f"未命中 {info['misses']}，合并提取 {info['coalesced']}"
+        )
+        yield event.plain_result("\n".join(lines))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("仲裁状态")
+    async def arbiter_status(self, event: AstrMessageEvent):
+        """查看各群仲裁快速通道状态"""
+        if self.arbiter.solo_rounds <= 0:
+            yield event.plain_result("独占快速通道未启用")
+            return
+        groups = self.arbiter.fast_path_groups()
+        fast = [gid for gid in groups if self.arbiter.is_fast_path(gid)]
+        lines = [
+            f"快速通道阈值: 连续独占 {self.arbiter.solo_rounds} 轮",
+            f"已记录群: {len(groups)}，快速通道: {len(fast)}",
+        ]
+        lines.extend(f"- {gid}（独占 {groups[gid]} 轮）" for gid in fast)
+        yield event.plain_result("\n".join(lines))
+
     @filter.permission_type(filter.PermissionType.ADMIN)
     @filter.command("同步油管cookie")
     async def sync_ytb_cookie(self, event: AstrMessageEvent):
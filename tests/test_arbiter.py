@@ -0,0 +1,59 @@
+"""EmojiLikeArbiter 测试：模拟多个 Bot 在同一条消息上仲裁"""
+
+import asyncio
+
+import pytest
+
+from core.arbiter import ArbiterContext, EmojiLikeArbiter
+
+
+class FakeBot:
+    """共享表情状态的 CQHTTP Bot；claim_lag 为占坑表情对他人可见前的延迟"""
+
+    def __init__(
+        self, likes: dict[int, list[int]], self_id: int, rtt: float, claim_lag: float
+    ):
+        self.likes = likes
+        self.self_id = self_id
+        self.rtt = rtt
+        self.claim_lag = claim_lag
+
+    async def fetch_emoji_like(self, message_id: int, emojiId: str, emojiType: str):
+        await asyncio.sleep(self.rtt / 2)
+        users = list(self.likes.get(int(emojiId), []))
+        await asyncio.sleep(self.rtt / 2)
+        return {"emojiLikesList": [{"tinyId": str(u)} for u in users]}
+
+    async def set_msg_emoji_like(
+        self, message_id: int, emoji_id: int, emoji_type: str, set: bool
+    ):
+        lag = self.claim_lag if emoji_id == EmojiLikeArbiter._EMOJI_ID else 0
+        await asyncio.sleep(self.rtt / 2 + lag)
+        self.likes.setdefault(emoji_id, []).append(self.self_id)
+        await asyncio.sleep(self.rtt / 2)
+
+
+async def _compete(adaptive: bool, claim_lags: list[float]) -> list[bool]:
+    likes: dict[int, list[int]] = {}
+    # self_id 越小在 msg_time=0 时排序越靠前，让占坑较慢的 Bot 排第一
+    bots = [
+        FakeBot(likes, len(claim_lags) - i, 0.02, lag)
+        for i, lag in enumerate(claim_lags)
+    ]
+    return await asyncio.gather(
+        *(
+            EmojiLikeArbiter(adaptive=adaptive).compete(
+                bot, ArbiterContext(1, 0, bot.self_id, group_id=10)
+            )
+            for bot in bots
+        )
+    )
+
+
+@pytest.mark.parametrize("peer_lag", [0.0, 0.3, 0.6])
+def test_adaptive_single_winner_with_slow_peer(peer_lag: float):
+    """对方占坑晚于本 Bot 的轮询稳定点落地时，自适应模式仍只有一个胜出者"""
+    fixed = asyncio.run(_compete(False, [0.0, peer_lag]))
+    adaptive = asyncio.run(_compete(True, [0.0, peer_lag]))
+    assert fixed.count(True) == 1
+    assert adaptive == fixed
@@ -0,0 +1,59 @@
+"""下载闸门测试：推测解析期间的下载任务须经 auto_task 创建"""
+
+import ast
+import asyncio
+from pathlib import Path
+
+import pytest
+
+PARSERS_DIR = Path(__file__).resolve().parent.parent / "core" / "parsers"
+
+
+@pytest.mark.parametrize(
+    "path", sorted(PARSERS_DIR.rglob("*.py")), ids=lambda p: p.name
+)
+def test_parsers_do_not_create_bare_tasks(path: Path):
+    """解析器中直接 create_task 的下载不受闸门约束，仲裁失败后也无法取消"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+        assert name not in ("create_task", "ensure_future"), (
+            f"{path.name}:{node.lineno} 请改用 @auto_task"
+        )
+
+
+def test_auto_task_waits_for_gate_and_cancels():
+    pytest.importorskip("astrbot")
+    pytest.importorskip("aiohttp")
+    from core.download import DownloadGate, auto_task, download_gate
+
+    started: list[str] = []
+
+    @auto_task
+    async def fetch(name: str) -> str:
+        started.append(name)
+        return name
+
+    async def main():
+        opened, cancelled = DownloadGate(), DownloadGate()
+
+        token = download_gate.set(opened)
+        kept = fetch("kept")
+        download_gate.reset(token)
+        token = download_gate.set(cancelled)
+        dropped = fetch("dropped")
+        download_gate.reset(token)
+
+        await asyncio.sleep(0.01)
+        assert started == []
+        opened.open()
+        cancelled.cancel()
+        assert await kept == "kept"
+        with pytest.raises(asyncio.CancelledError):
+            await dropped
+        assert started == ["kept"]
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""FFmpegPool 测试：排队、超时与边下载边处理的任务"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from core import scheduler  # noqa: E402
+from core.scheduler import FFmpegPool  # noqa: E402
+
+REMUX = ["ffmpeg", "-i", "in", "-c", "copy", "out"]
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch: pytest.MonkeyPatch):
+    """以 cmd[-1] 为秒数的假 ffmpeg，记录启动顺序"""
+    started: list[str] = []
+
+    async def exec_ffmpeg_cmd(cmd: list[str], pass_fds=(), event=None):
+        started.append(cmd[-2])
+        if event is not None:
+            event.set()
+        await asyncio.sleep(float(cmd[-1]))
+        return ""
+
+    monkeypatch.setattr(scheduler, "exec_ffmpeg_cmd", exec_ffmpeg_cmd)
+    return started
+
+
+def _cmd(name: str, seconds: float) -> list[str]:
+    return [*REMUX[:-1], name, str(seconds)]
+
+
+def test_streaming_job_does_not_hold_a_slot(fake_ffmpeg: list[str]):
+    pool = FFmpegPool({"ffmpeg_workers": 1, "ffmpeg_timeout": 5})
+
+    async def main():
+        input_done = asyncio.Event()
+        streaming = asyncio.create_task(
+            pool.run(_cmd("stream", 0.5), input_done=input_done)
+        )
+        await asyncio.sleep(0.05)
+        # 唯一的名额未被边下载边合并的任务占用，短合并立即执行
+        await asyncio.wait_for(pool.run(_cmd("short", 0.05)), 0.3)
+        assert pool.stats()["streaming"] == 1
+        input_done.set()
+        await streaming
+
+    asyncio.run(main())
+    assert fake_ffmpeg == ["stream", "short"]
+    stats = pool.stats()
+    assert stats["streamed"] == 1
+    # 边下载边合并的任务单独计入耗时统计
+    count, avg, peak = stats["jobs"]["STREAM"]
+    assert count == 1 and 0.4 <= avg == peak < 1
+    assert stats["stream_tail"] < avg
+
+
+def test_streaming_timeout_starts_after_input(fake_ffmpeg: list[str]):
+    pool = FFmpegPool({"ffmpeg_workers": 1, "ffmpeg_timeout": 0.2})
+
+    async def main():
+        # 下载期间（输入未写完）超过超时时长也不结束进程
+        input_done = asyncio.Event()
+        job = asyncio.create_task(
+            pool.run(_cmd("slow-net", 0.5), input_done=input_done)
+        )
+        await asyncio.sleep(0.35)
+        input_done.set()
+        await job
+        assert pool.timed_out == 0
+
+        # 输入写完后仍超时，按超时处理
+        input_done = asyncio.Event()
+        input_done.set()
+        with pytest.raises(RuntimeError):
+            await pool.run(_cmd("stuck", 1), input_done=input_done)
+        assert pool.timed_out == 1
+        assert pool.stats()["streaming"] == 0
+
+    asyncio.run(main())
+
+
+def test_regular_job_timeout(fake_ffmpeg: list[str]):
+    pool = FFmpegPool({"ffmpeg_workers": 1, "ffmpeg_timeout": 0.1})
+    with pytest.raises(RuntimeError):
+        asyncio.run(pool.run(_cmd("stuck", 1)))
+    assert pool.timed_out == 1
@@ -0,0 +1,65 @@
+"""MediaCache 测试：渲染卡片与 emoji 子目录计入容量并参与淘汰"""
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("astrbot")
+
+from core.media_cache import MediaCache  # noqa: E402
+
+KB = 1024
+
+
+def _write(path: Path, size: int, mtime: float) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _cache(cache_dir: Path, max_kb: int) -> MediaCache:
+    cache = MediaCache({"cache_dir": str(cache_dir)})
+    cache.max_bytes = max_kb * KB
+    return cache
+
+
+def test_rescan_counts_emojis_and_evicts_them(tmp_path: Path):
+    old = _write(tmp_path / "emojis" / "twitter" / "1f600.png", 40 * KB, 1000)
+    video = _write(tmp_path / "BV1.mp4", 40 * KB, 2000)
+    # 不归缓存管理的子目录不计入
+    _write(tmp_path / "other" / "x.bin", 400 * KB, 500)
+
+    cache = _cache(tmp_path, 100)
+    assert asyncio.run(cache.rescan()) == []
+    assert cache.usage == 80 * KB
+
+    _write(tmp_path / "emojis" / "discord" / "123.png", 20 * KB, 3000)
+    asyncio.run(cache.rescan())
+    assert cache.usage == 100 * KB
+    # 超过高水位，淘汰最久未访问的 emoji 直到低于低水位
+    assert cache.evict_candidates() == [old]
+    assert cache.usage == 60 * KB
+    assert video.exists()
+
+
+def test_add_registers_card_and_emoji(tmp_path: Path):
+    cache = _cache(tmp_path, 100)
+    card = _write(tmp_path / "card_abc.png", 30 * KB, 1000)
+    emoji = _write(tmp_path / "emojis" / "twitter" / "1f600.png", 10 * KB, 1000)
+    other = _write(tmp_path / "other" / "x.bin", 10 * KB, 1000)
+
+    cache.add(card, platform="bilibili")
+    cache.add(emoji)
+    cache.add(other)
+    assert cache.usage == 40 * KB
+    assert cache.platform_stats()["bilibili"] == (1, 30 * KB)
+
+    # 使用中的文件不会被淘汰
+    cache.max_bytes = 40 * KB
+    with cache.using([card, emoji]):
+        assert cache.evict_candidates() == []
+    assert cache.evict_candidates() == [card]
+    assert cache.usage == 10 * KB
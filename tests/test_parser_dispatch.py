@@ -0,0 +1,83 @@
+"""解析器分发表测试：每个 @handle 关键词都应分发到对应的异步解析方法"""
+
+import ast
+import inspect
+from pathlib import Path
+
+import pytest
+
+PARSERS_DIR = Path(__file__).resolve().parent.parent / "core" / "parsers"
+
+
+def _is_handle(decorator: ast.expr) -> bool:
+    return (
+        isinstance(decorator, ast.Call)
+        and isinstance(decorator.func, ast.Name)
+        and decorator.func.id == "handle"
+    )
+
+
+@pytest.mark.parametrize(
+    "path", sorted(PARSERS_DIR.rglob("*.py")), ids=lambda p: p.name
+)
+def test_handle_decorates_async_parse_method(path: Path):
+    """静态检查：@handle 只能直接装饰异步解析方法"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+            continue
+        if any(_is_handle(d) for d in node.decorator_list):
+            assert isinstance(node, ast.AsyncFunctionDef), (
+                f"{path.name}:{node.lineno} @handle 装饰了同步方法 {node.name}"
+            )
+
+
+def _parser_classes():
+    pytest.importorskip("astrbot")
+    pytest.importorskip("aiohttp")
+    from core.parsers import BaseParser
+
+    return BaseParser.get_all_subclass()
+
+
+def test_every_keyword_dispatches_to_coroutine():
+    for cls in _parser_classes():
+        assert cls._key_patterns, f"{cls.__name__} 未注册任何关键词"
+        for keyword, _ in cls._key_patterns:
+            handler = cls._handlers[keyword]
+            assert inspect.iscoroutinefunction(handler), (
+                f"{cls.__name__}: {keyword!r} -> {handler.__name__}"
+            )
+            assert handler.__name__ != "media_key"
+
+
+@pytest.mark.parametrize(
+    ("parser", "url", "handler"),
+    [
+        (
+            "WeiBoParser",
+            "https://weibo.com/tv/show/1034:5007449447661594?mid=5007452630158934",
+            "_parse_weibo_tv",
+        ),
+        (
+            "WeiBoParser",
+            "https://video.weibo.com/show?fid=1034:5145615399845897",
+            "_parse_video_weibo",
+        ),
+        (
+            "XiaoHongShuParser",
+            "http://xhslink.com/a/WHdZNpdzwbl7",
+            "_parse_short_link",
+        ),
+        (
+            "XiaoHongShuParser",
+            "https://www.xiaohongshu.com/explore/68feefe40000000007030c4a?xsec_token=AB",
+            "_parse_explore",
+        ),
+    ],
+)
+def test_search_url_dispatch(parser: str, url: str, handler: str):
+    classes = {cls.__name__: cls for cls in _parser_classes()}
+    cls = classes[parser]
+    keyword, _ = cls.search_url(url)
+    assert cls._handlers[keyword].__name__ == handler
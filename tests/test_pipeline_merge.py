@@ -0,0 +1,100 @@
+"""边下载边合并测试：管道输入无法顺序解析时退回先下载再合并"""
+
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("astrbot")
+web = pytest.importorskip("aiohttp.web")
+
+if shutil.which("ffmpeg") is None:
+    pytest.skip("需要 ffmpeg", allow_module_level=True)
+
+from core import download  # noqa: E402
+from core.download import Downloader  # noqa: E402
+from core.utils import probe_stream_types  # noqa: E402
+
+
+def _ffmpeg(*args: str):
+    subprocess.run(["ffmpeg", "-v", "error", "-y", *args], check=True)
+
+
+@pytest.fixture(scope="module")
+def media(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    root = tmp_path_factory.mktemp("media")
+    # 视频 moov 在前，可从管道读取
+    _ffmpeg(
+        "-f", "lavfi", "-i", "testsrc=size=160x120:rate=10", "-t", "2",
+        "-c:v", "mpeg4", "-movflags", "+faststart", str(root / "v.mp4"),
+    )
+    # 音频 moov 在末尾（MP4 默认布局），体积超过管道与探测缓冲
+    _ffmpeg(
+        "-f", "lavfi", "-i", "anoisesrc=d=8", "-c:a", "aac", "-b:a", "320k",
+        str(root / "a.mp4"),
+    )
+    return root
+
+
+def test_moov_at_end_falls_back(
+    media: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    config = {
+        "cache_dir": str(cache_dir),
+        "proxy": None,
+        "source_max_minute": 10,
+        "source_max_size": 100,
+        "common_timeout": 15,
+        "download_timeout": 60,
+        "download_segments": 1,
+        "ytdlp_info_cache_persist": False,
+    }
+
+    pipelined: list[BaseException] = []
+    fallback: list[Path] = []
+    real_pipelined = Downloader._merge_pipelined
+    real_merge_av = download.merge_av
+
+    async def spy_pipelined(self, *args, **kwargs):
+        try:
+            return await real_pipelined(self, *args, **kwargs)
+        except BaseException as exc:
+            pipelined.append(exc)
+            raise
+
+    async def spy_merge_av(**kwargs):
+        fallback.append(kwargs["output_path"])
+        await real_merge_av(**kwargs)
+
+    monkeypatch.setattr(Downloader, "_merge_pipelined", spy_pipelined)
+    monkeypatch.setattr(download, "merge_av", spy_merge_av)
+
+    async def main():
+        app = web.Application()
+        app.router.add_static("/", media)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        base = f"http://127.0.0.1:{port}"
+
+        downloader = Downloader(config)  # type: ignore[arg-type]
+        try:
+            output = await downloader.download_av_and_merge(
+                f"{base}/v.mp4", f"{base}/a.mp4", output_path=cache_dir / "out.mp4"
+            )
+            return output, await probe_stream_types(output)
+        finally:
+            await downloader.close()
+            await runner.cleanup()
+
+    output, streams = asyncio.run(main())
+    assert len(pipelined) == 1, "边下载边合并应当失败"
+    assert fallback == [output]
+    assert {"video", "audio"} <= streams
+    assert not list(output.parent.glob("*.tmp*"))
@@ -0,0 +1,57 @@
+"""ParseResultCache 测试：按平台 TTL 过期"""
+
+import pytest
+
+from core import result_cache
+from core.data import ParseResult, Platform
+from core.result_cache import ParseResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _result(name: str) -> ParseResult:
+    return ParseResult(platform=Platform(name=name, display_name=name))
+
+
+def test_platform_ttl_shorter_than_global(clock: list[float]):
+    cache = ParseResultCache({"parse_cache_ttl": 3600})
+    cache.put("douyin", "v1", _result("douyin"), 600)
+    cache.put("nga", "t1", _result("nga"), 3600)
+
+    clock[0] += 601
+    assert cache.get("douyin", "v1") is None
+    assert cache.get("nga", "t1") is not None
+
+
+def test_global_ttl_caps_platform_ttl(clock: list[float]):
+    cache = ParseResultCache({"parse_cache_ttl": 300})
+    cache.put("nga", "t1", _result("nga"), 3600)
+
+    clock[0] += 301
+    assert cache.get("nga", "t1") is None
+
+
+def test_parser_cache_ttl_is_honored(clock: list[float]):
+    pytest.importorskip("astrbot")
+    pytest.importorskip("aiohttp")
+    from core.parsers import BaseParser
+
+    overridden = {
+        cls.platform.name: cls.cache_ttl
+        for cls in BaseParser.get_all_subclass()
+        if cls.cache_ttl != BaseParser.cache_ttl
+    }
+    assert {"bilibili", "douyin", "kuaishou", "xiaohongshu"} <= overridden.keys()
+
+    for name, ttl in overridden.items():
+        cache = ParseResultCache({"parse_cache_ttl": BaseParser.cache_ttl})
+        cache.put(name, "id", _result(name), ttl)
+        clock[0] += ttl - 1
+        assert cache.get(name, "id") is not None
+        clock[0] += 2
+        assert cache.get(name, "id") is None, f"{name} 未按 cache_ttl={ttl} 过期"
@@ -0,0 +1,89 @@
+"""YoutubeDLPool 测试：Cookie 文件变化时的重建与复用"""
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("astrbot")
+pytest.importorskip("yt_dlp")
+
+from core.ytdlp_pool import YoutubeDLPool  # noqa: E402
+
+COOKIE_HEADER = "# Netscape HTTP Cookie File\n"
+
+
+def _cookie_line(name: str, value: str) -> str:
+    return f".example.com\tTRUE\t/\tFALSE\t4102444800\t{name}\t{value}\n"
+
+
+def _write_cookies(path: Path, name: str, value: str, mtime_ns: int):
+    path.write_text(COOKIE_HEADER + _cookie_line(name, value))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _cookie_names(ydl) -> set[str]:
+    return {cookie.name for cookie in ydl.cookiejar}
+
+
+def _fail(ydl):
+    raise ValueError("boom")
+
+
+def test_cookie_change_between_acquires(tmp_path: Path):
+    cookiefile = tmp_path / "cookies.txt"
+    _write_cookies(cookiefile, "old", "1", 1_000_000_000_000_000_000)
+    pool = YoutubeDLPool({"ytdlp_pool_size": 2, "ytdlp_pool_max_uses": 50})
+    opts = {"cookiefile": str(cookiefile), "quiet": True}
+
+    async def run(func=_cookie_names):
+        return await pool.run(opts, func)
+
+    assert asyncio.run(run()) == {"old"}
+    assert asyncio.run(run()) == {"old"}
+    assert (pool.created, pool.reused) == (1, 1)
+
+    # Cookie 文件更新后，旧实例被关闭重建且不回写旧 Cookie
+    _write_cookies(cookiefile, "new", "2", 1_000_000_100_000_000_000)
+    updated = cookiefile.read_text()
+    assert asyncio.run(run()) == {"new"}
+    assert cookiefile.read_text() == updated
+    assert (pool.created, pool.reused, pool.recycled) == (2, 1, 1)
+
+    # 调用出错关闭实例后，之后的调用仍能复用，不会反复判为过期
+    with pytest.raises(ValueError):
+        asyncio.run(run(_fail))
+    assert cookiefile.read_text() == updated
+    for _ in range(6):
+        assert asyncio.run(run()) == {"new"}
+    assert pool.created == 3
+    assert pool.reused == 7
+
+    pool.close()
+    assert cookiefile.read_text() == updated
+
+
+def _crash(ydl):
+    os._exit(1)
+
+
+def _noop(ydl):
+    return "ok"
+
+
+def test_worker_crash_with_progress_relay():
+    pool = YoutubeDLPool({"ytdlp_processes": 1})
+    opts = {"quiet": True, "progress_hooks": [lambda d: None]}
+
+    async def main():
+        # 进度转发进行中工作进程退出，应抛出原错误而非队列错误，且不挂起
+        with pytest.raises(RuntimeError, match="工作进程异常退出"):
+            await asyncio.wait_for(pool.run(opts, _crash), 60)
+        # 进程池重建后可继续使用
+        assert await asyncio.wait_for(pool.run(opts, _noop), 60) == "ok"
+
+    try:
+        asyncio.run(main())
+    finally:
+        pool._shutdown_executor()